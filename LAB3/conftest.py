@@ -1,6 +1,19 @@
-
 import sys
 import os
+import atexit
+import shutil
+import tempfile
 
 project_root = os.path.dirname(os.path.abspath(__file__))
-sys.path.insert(0, project_root)
\ No newline at end of file
+sys.path.insert(0, project_root)
+
+# Тести не потребують сервера MySQL: за замовчуванням працюють з тимчасовою базою SQLite,
+# власним кешем і реєстром моделей. TEST_DB_BACKEND=mysql повертає підключення з .env
+_test_dir = tempfile.mkdtemp(prefix="lab3-tests-")
+atexit.register(shutil.rmtree, _test_dir, ignore_errors=True)
+
+if os.getenv("TEST_DB_BACKEND", "sqlite") == "sqlite":
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(_test_dir, "weather_prediction.db")
+os.environ["DATA_CACHE_DIR"] = os.path.join(_test_dir, "cache")
+os.environ["MODEL_REGISTRY_DIR"] = os.path.join(_test_dir, "registry")
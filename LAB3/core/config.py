@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
 from dataclasses import dataclass, field
@@ -10,13 +10,22 @@ load_dotenv()
 
 @dataclass
 class DatabaseConfig:
+    backend: str = field(default_factory=lambda: os.getenv("DB_BACKEND", "mysql").lower())
     host: str = field(default_factory=lambda: os.getenv("DB_HOST", "localhost"))
     port: int = field(default_factory=lambda: int(os.getenv("DB_PORT", "3306")))
     name: str = field(default_factory=lambda: os.getenv("DB_NAME", "weather_prediction"))
     user: str = field(default_factory=lambda: os.getenv("DB_USER", "root"))
     password: str = field(default_factory=lambda: os.getenv("DB_PASSWORD", ""))
+    sqlite_path: Path = field(default_factory=lambda: Path(os.getenv("SQLITE_PATH", "data/weather_prediction.db")))
+    pool_size: int = field(default_factory=lambda: int(os.getenv("DB_POOL_SIZE", "5")))
+    max_overflow: int = field(default_factory=lambda: int(os.getenv("DB_MAX_OVERFLOW", "10")))
+    pool_recycle: int = field(default_factory=lambda: int(os.getenv("DB_POOL_RECYCLE", "1800")))
+    cache_dir: Path = field(default_factory=lambda: Path(os.getenv("DATA_CACHE_DIR", "cache")))
+    use_cache: bool = field(default_factory=lambda: os.getenv("USE_DATA_CACHE", "True").lower() == "true")
     
     def get_connection_string(self) -> str:
+        if self.backend == "sqlite":
+            return f"sqlite:///{self.sqlite_path}"
         return f"mysql+mysqlconnector://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
 
 @dataclass
@@ -30,6 +39,26 @@ class ModelConfig:
     validation_split: float = field(default_factory=lambda: float(os.getenv("VALIDATION_SPLIT", "0.2")))
     early_stopping_patience: int = field(default_factory=lambda: int(os.getenv("EARLY_STOPPING_PATIENCE", "10")))
     reduce_lr_patience: int = field(default_factory=lambda: int(os.getenv("REDUCE_LR_PATIENCE", "5")))
+    lstm_units: Tuple[int, ...] = field(default_factory=lambda: tuple(int(units) for units in os.getenv("LSTM_UNITS", "128,64").split(",")))
+    dense_units: int = field(default_factory=lambda: int(os.getenv("DENSE_UNITS", "32")))
+    fine_tune_epochs: int = field(default_factory=lambda: int(os.getenv("FINE_TUNE_EPOCHS", "5")))
+    cv_workers: int = field(default_factory=lambda: int(os.getenv("CV_WORKERS", "0")))
+    cv_tf_threads: int = field(default_factory=lambda: int(os.getenv("CV_TF_THREADS", "1")))
+    runtime: str = field(default_factory=lambda: os.getenv("MODEL_RUNTIME", "keras"))
+    numpy_model_path: Path = field(default_factory=lambda: Path(os.getenv("NUMPY_MODEL_PATH", "models/temperature_lstm.npz")))
+    registry_dir: Path = field(default_factory=lambda: Path(os.getenv("MODEL_REGISTRY_DIR", "models/registry")))
+    resident_models: int = field(default_factory=lambda: int(os.getenv("RESIDENT_MODELS", "3")))
+    registry_keep: int = field(default_factory=lambda: int(os.getenv("REGISTRY_KEEP", "10")))
+    inference_precision: str = field(default_factory=lambda: os.getenv("INFERENCE_PRECISION", "float32"))
+    mc_samples: int = field(default_factory=lambda: int(os.getenv("MC_SAMPLES", "0")))
+    prediction_interval: float = field(default_factory=lambda: float(os.getenv("PREDICTION_INTERVAL", "0.9")))
+    intra_op_threads: int = field(default_factory=lambda: int(os.getenv("TF_INTRA_OP_THREADS", "0")))
+    inter_op_threads: int = field(default_factory=lambda: int(os.getenv("TF_INTER_OP_THREADS", "0")))
+    jit_compile: str = field(default_factory=lambda: os.getenv("JIT_COMPILE", "auto"))
+    mixed_precision: str = field(default_factory=lambda: os.getenv("MIXED_PRECISION", "float32"))
+    data_workers: int = field(default_factory=lambda: int(os.getenv("DATA_WORKERS", "2")))
+    prefetch_batches: int = field(default_factory=lambda: int(os.getenv("PREFETCH_BATCHES", "8")))
+    cache_dataset: bool = field(default_factory=lambda: os.getenv("CACHE_DATASET", "True").lower() == "true")
     
     def __post_init__(self):
         ensure_directory(self.model_path.parent)
@@ -40,15 +69,27 @@ class AppConfig:
     debug: bool = field(default_factory=lambda: os.getenv("DEBUG", "True").lower() == "true")
     log_level: str = field(default_factory=lambda: os.getenv("LOG_LEVEL", "INFO"))
     log_file: Optional[Path] = field(default_factory=lambda: Path(os.getenv("LOG_FILE", "logs/app.log")))
+    startup_report: Path = field(default_factory=lambda: Path(os.getenv("STARTUP_REPORT", "logs/startup.jsonl")))
     
     def __post_init__(self):
         ensure_directory(self.log_file.parent)
 
+@dataclass
+class ServiceConfig:
+    host: str = field(default_factory=lambda: os.getenv("SERVICE_HOST", "127.0.0.1"))
+    port: int = field(default_factory=lambda: int(os.getenv("SERVICE_PORT", "8080")))
+    max_batch_size: int = field(default_factory=lambda: int(os.getenv("SERVICE_MAX_BATCH_SIZE", "64")))
+    max_wait_ms: float = field(default_factory=lambda: float(os.getenv("SERVICE_MAX_WAIT_MS", "10")))
+    data_ttl: float = field(default_factory=lambda: float(os.getenv("SERVICE_DATA_TTL", "60")))
+    request_timeout: float = field(default_factory=lambda: float(os.getenv("SERVICE_REQUEST_TIMEOUT", "30")))
+    max_forecast_years: int = field(default_factory=lambda: int(os.getenv("SERVICE_MAX_FORECAST_YEARS", "10")))
+
 class Config:
     def __init__(self):
         self.db = DatabaseConfig()
         self.model = ModelConfig()
         self.app = AppConfig()
+        self.service = ServiceConfig()
         
     def validate(self) -> bool:
         try:
@@ -61,6 +102,8 @@ class Config:
             return False
 
     def _validate_db(self):
+        if self.db.backend == "sqlite":
+            return
         if not all([self.db.host, self.db.port, self.db.name, self.db.user, self.db.password]):
             raise ValueError("Відсутні необхідні параметри підключення до бази даних")
 
@@ -75,6 +118,16 @@ class Config:
             raise ValueError("epochs повинен бути більше 0")
         if not 0 < self.model.validation_split < 1:
             raise ValueError("validation_split повинен бути між 0 та 1")
+        if len(self.model.lstm_units) != 2 or min(self.model.lstm_units) <= 0:
+            raise ValueError("lstm_units повинен містити дві додатні ширини шарів")
+        if self.model.runtime not in ("keras", "numpy"):
+            raise ValueError("runtime повинен бути 'keras' або 'numpy'")
+        if self.model.inference_precision not in ("float32", "float16", "int8"):
+            raise ValueError("inference_precision повинен бути 'float32', 'float16' або 'int8'")
+        if self.model.jit_compile not in ("auto", "true", "false"):
+            raise ValueError("jit_compile повинен бути 'auto', 'true' або 'false'")
+        if self.model.mixed_precision not in ("float32", "mixed_float16", "mixed_bfloat16"):
+            raise ValueError("mixed_precision повинен бути 'float32', 'mixed_float16' або 'mixed_bfloat16'")
         
     def _validate_app(self):
         if self.app.log_file and not self.app.log_file.parent.exists():
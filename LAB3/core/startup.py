@@ -0,0 +1,50 @@
+import json
+import threading
+import time
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def mark(self, name: str) -> float:
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            self.marks.append((name, elapsed))
+        return elapsed
+
+    def report(self, extra: Optional[Dict[str, float]] = None) -> str:
+        with self._lock:
+            marks = list(self.marks)
+
+        lines = ["Звіт про запуск:"]
+        previous = 0.0
+        for name, elapsed in marks:
+            lines.append(f"  {name:<32} {elapsed * 1000:8.0f} мс  (+{(elapsed - previous) * 1000:.0f} мс)")
+            previous = elapsed
+        for name, seconds in (extra or {}).items():
+            lines.append(f"  {name:<32} {seconds * 1000:8.0f} мс")
+        return "\n".join(lines)
+
+    def save(self, path: Path, extra: Optional[Dict[str, float]] = None):
+        with self._lock:
+            record = {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "marks": {name: round(elapsed, 4) for name, elapsed in self.marks},
+                "extra": {name: round(seconds, 4) for name, seconds in (extra or {}).items()},
+            }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Не вдалося записати звіт про запуск: {e}")
+
+
+startup_profiler = StartupProfiler()
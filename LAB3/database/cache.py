@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+class HistoryCache:
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def make_key(watermark: Dict[str, Any]) -> str:
+        payload = json.dumps(watermark, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    def load(self, name: str, watermark: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+        entry_dir = self.cache_dir / name / self.make_key(watermark)
+        meta_path = entry_dir / "meta.json"
+        if not meta_path.exists():
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            return {
+                column: np.load(entry_dir / f"{column}.npy", mmap_mode="r")
+                for column in meta["columns"]
+            }
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Пошкоджений кеш {entry_dir}: {e}")
+            return None
+
+    def store(self, name: str, watermark: Dict[str, Any], columns: Dict[str, np.ndarray]):
+        key = self.make_key(watermark)
+        name_dir = self.cache_dir / name
+        entry_dir = name_dir / key
+        tmp_dir = name_dir / f".{key}.{os.getpid()}.tmp"
+
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+            for column, values in columns.items():
+                np.save(tmp_dir / f"{column}.npy", np.ascontiguousarray(values))
+
+            # meta.json пишеться останнім: його наявність означає, що запис повний
+            with open(tmp_dir / "meta.json", "w", encoding="utf-8") as file:
+                json.dump({"watermark": watermark, "columns": list(columns)}, file, default=str)
+
+            if entry_dir.exists():
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            else:
+                os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            print(f"Не вдалося записати кеш {entry_dir}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        # Застарілі записи можуть бути ще відображені в пам'ять (Windows), тому помилки ігноруються
+        for stale_dir in name_dir.iterdir():
+            if stale_dir.name != key and not stale_dir.name.startswith("."):
+                shutil.rmtree(stale_dir, ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
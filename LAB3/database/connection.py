@@ -1,13 +1,13 @@
 import logging
 
 from .models import Base
-from typing import Generator, Optional
+from typing import Generator, Optional, Union
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import create_engine, text
 from contextlib import contextmanager
 
-from core.config import DatabaseConfig
+from core.config import Config, DatabaseConfig
 logger = logging.getLogger(__name__)
 
 class DatabaseError(Exception):
@@ -20,15 +20,17 @@ class QueryError(DatabaseError):
     pass
 
 class DatabaseConnection:
-    def __init__(self, config: DatabaseConfig):
+    def __init__(self, config: Union[Config, DatabaseConfig]):
         try:
-            self.connection_string = config.db.get_connection_string()
+            db_config = config.db if isinstance(config, Config) else config
+            self.connection_string = db_config.get_connection_string()
             self.engine = create_engine(
                 self.connection_string,
-                pool_size=5,
-                max_overflow=10,
+                pool_size=db_config.pool_size,
+                max_overflow=db_config.max_overflow,
                 pool_timeout=30,
-                pool_recycle=1800
+                pool_recycle=db_config.pool_recycle,
+                pool_pre_ping=True
             )
             self.Session = sessionmaker(
                 bind=self.engine,
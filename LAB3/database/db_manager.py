@@ -1,104 +1,422 @@
 import json
-import mysql.connector
+import time
+import uuid
+import tracemalloc
+import numpy as np
 import pandas as pd
 
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from contextlib import contextmanager
 
 from core.config import DatabaseConfig
+from database.cache import HistoryCache
+from database.connection import DatabaseConnection
+from database.dialects import get_dialect
 
 
 class DatabaseManager:
     DEFAULT_COLUMN = "temperature"
+    DEFAULT_MODEL_VERSION = "default"
+    DEFAULT_STATION = "default"
+    # Межі інтервалу прогнозу та його рівень довіри: ключі записів і відповідні стовпці predictions
+    INTERVAL_KEYS = ("min_temp_low", "min_temp_high", "max_temp_low", "max_temp_high", "confidence")
+    INTERVAL_COLUMNS = ("min_temperature_low", "min_temperature_high",
+                        "max_temperature_low", "max_temperature_high", "confidence")
+    # Таблиці, ключ яких змінився після першої версії схеми: старі копії перебудовуються під новий ключ
+    TABLE_KEYS = {
+        "temperature_data": ("station_id", "timestamp"),
+        "daily_temperature": ("station_id", "date"),
+        "predictions": ("station_id", "date", "model_version"),
+    }
+    DAILY_COLUMNS = ("station_id", "date", "min_temperature", "max_temperature", "sample_count")
+    TIMESTAMP_FORMAT = "%Y%m%dT%H%M"
+    IMPORT_CHUNK_SIZE = 50_000
+    INSERT_BATCH_SIZE = 5_000
+    READ_CHUNK_SIZE = 50_000
 
     def __init__(self, db_config: DatabaseConfig):
         self.db_config = db_config
-        self.connection = None
+        self.connection: Optional[DatabaseConnection] = None
+        self.last_import_stats: Dict[str, Optional[float]] = {}
+        self.cache = HistoryCache(db_config.cache_dir) if db_config.use_cache else None
+        self.dialect = get_dialect(db_config.backend)
         self.connect()
         self.create_tables()
 
     def connect(self):
-        self.connection = mysql.connector.connect(
-            host=self.db_config.host,
-            user=self.db_config.user,
-            password=self.db_config.password,
-            database=self.db_config.name,
-            port=self.db_config.port
-        )
+        if self.connection is None:
+            self.connection = DatabaseConnection(self.db_config)
 
     @contextmanager
-    def db_cursor(self, dictionary: bool = False):
-        cursor = self.connection.cursor(dictionary=dictionary)
+    def raw_connection(self):
+        # Кожна операція бере власне з'єднання з пулу, тож менеджер безпечно використовувати з робочих потоків
+        connection = self.connection.engine.raw_connection()
         try:
-            yield cursor
-            self.connection.commit()
-        except Exception:
-            self.connection.rollback()
-            raise
+            yield connection
         finally:
-            cursor.close()
+            connection.close()
+
+    @contextmanager
+    def db_cursor(self, dictionary: bool = False):
+        with self.raw_connection() as connection:
+            cursor = self.dialect.cursor(connection, dictionary=dictionary)
+            try:
+                yield cursor
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
 
     def create_tables(self):
         with self.db_cursor() as cursor:
-            with open("database/lab3.sql", 'r') as file:
-                sql_commands = file.read()
-                for command in sql_commands.split(';'):
-                    if command.strip():
-                        cursor.execute(command)
+            legacy_tables = self._rename_legacy_tables(cursor)
+            self._execute_schema(cursor)
+            if legacy_tables:
+                for table in legacy_tables:
+                    self._copy_legacy_table(cursor, table)
+                # Індекси старих таблиць зникли разом з ними, тож схема виконується ще раз
+                self._execute_schema(cursor)
+
+            # Таблиці, створені старішою схемою, отримують нові стовпці без перестворення
+            self._ensure_column(cursor, "predictions", "forecast_key", "CHAR(40) NULL")
+            for column in self.INTERVAL_COLUMNS:
+                self._ensure_column(cursor, "predictions", column, "FLOAT NULL")
+            self._ensure_column(cursor, "models_metadata", "data_watermark", "DATE NULL")
+            self._ensure_column(cursor, "models_metadata", "hyperparameters", "TEXT NULL")
+            self._ensure_column(cursor, "models_metadata", "version", "VARCHAR(64) NULL")
+            self._ensure_column(cursor, "models_metadata", "model_path", "VARCHAR(255) NULL")
+
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM daily_temperature), EXISTS(SELECT 1 FROM temperature_data)")
+            has_rollup, has_data = cursor.fetchone()
+            if has_data and not has_rollup:
+                self._refresh_daily_rollup(cursor)
+
+            # Станції, дані яких з'явилися до таблиці ревізій, отримують спільну нову ревізію,
+            # щоб кеш не сплутав їх з іншою базою
+            cursor.execute("""
+                INSERT INTO data_revisions (station_id, revision)
+                SELECT DISTINCT daily.station_id, %s
+                FROM daily_temperature daily
+                LEFT JOIN data_revisions revisions ON revisions.station_id = daily.station_id
+                WHERE revisions.station_id IS NULL
+            """, (uuid.uuid4().hex,))
+
+    def _execute_schema(self, cursor):
+        with open(self.dialect.schema_path, 'r') as file:
+            sql_commands = file.read()
+            for command in sql_commands.split(';'):
+                if command.strip():
+                    cursor.execute(command)
 
-    def import_csv_data(self, csv_path: str) -> bool:
+    @staticmethod
+    def _table_columns(cursor, table: str) -> Optional[List[str]]:
         try:
-            df = pd.read_csv(csv_path)
+            cursor.execute(f"SELECT * FROM {table} LIMIT 0")
+        except Exception:
+            return None
+        columns = [description[0] for description in cursor.description]
+        cursor.fetchall()
+        return columns
 
+    def _rename_legacy_tables(self, cursor) -> List[str]:
+        # Ключ не додати через ALTER TABLE в обох діалектах, тож стара таблиця відкладається,
+        # а схема створює нову, в яку потім копіюються рядки
+        legacy_tables = []
+        for table, keys in self.TABLE_KEYS.items():
+            columns = self._table_columns(cursor, table)
+            if columns is not None and not set(keys) <= set(columns):
+                print(f"Міграція таблиці {table} на ключ ({', '.join(keys)})")
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+                legacy_tables.append(table)
+        return legacy_tables
+
+    def _copy_legacy_table(self, cursor, table: str):
+        legacy_columns = self._table_columns(cursor, f"{table}_legacy")
+        # Стовпці ключа, яких не було, отримують значення за замовчуванням зі схеми
+        columns = [column for column in self._table_columns(cursor, table) if column in legacy_columns]
+        keys = self.TABLE_KEYS[table]
+        updates = [column for column in columns if column not in keys and column != "id"]
+        column_list = ", ".join(columns)
+        # Дублікати за новим ключем зводяться до останнього рядка; WHERE потрібен SQLite для ON CONFLICT
+        cursor.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {table}_legacy WHERE 1 = 1 "
+                       + self.dialect.upsert_clause(keys, updates))
+        cursor.execute(f"DROP TABLE {table}_legacy")
+
+    @classmethod
+    def _ensure_column(cls, cursor, table: str, column: str, definition: str):
+        if column not in cls._table_columns(cursor, table):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def import_csv_data(self, csv_path: str, chunk_size: int = IMPORT_CHUNK_SIZE,
+                        incremental: bool = False, station_id: str = DEFAULT_STATION,
+                        trace_memory: bool = False) -> bool:
+        try:
             with self.db_cursor() as cursor:
-                cursor.execute("SELECT COUNT(*) FROM temperature_data")
-                count = cursor.fetchone()[0]
-
-                if count == 0:
-                    df = self.fill_missing_temperatures(df, self.DEFAULT_COLUMN)
-                    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%Y%m%dT%H%M", errors="coerce")
-
-                    for _, row in df.iterrows():
-                        if pd.isna(row["timestamp"]):
-                            continue
-                        temperature = row[self.DEFAULT_COLUMN]
-                        cursor.execute("""
-                            INSERT INTO temperature_data (timestamp, temperature)
-                            VALUES (%s, %s)
-                        """, (row["timestamp"], temperature))
-
-                    print(f"Імпортовано {len(df)} записів")
-                    return True
-                return False
+                if incremental:
+                    cursor.execute("SELECT MAX(timestamp) FROM temperature_data WHERE station_id = %s", (station_id,))
+                    watermark = cursor.fetchone()[0]
+                else:
+                    cursor.execute("SELECT COUNT(*) FROM temperature_data WHERE station_id = %s", (station_id,))
+                    count = cursor.fetchone()[0]
+                    if count > 0:
+                        return False
+                    watermark = None
+
+            # tracemalloc сповільнює масовий імпорт у кілька разів, тож пік пам'яті вимірюється лише на запит
+            tracing = tracemalloc.is_tracing()
+            if trace_memory:
+                if not tracing:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+            peak_memory = None
+            started = time.perf_counter()
+
+            try:
+                imported = 0
+                last_temperature = None
+                for chunk in pd.read_csv(csv_path, usecols=["timestamp", self.DEFAULT_COLUMN], chunksize=chunk_size):
+                    rows, last_temperature = self._prepare_chunk(chunk, last_temperature, watermark, station_id)
+                    with self.db_cursor() as cursor:
+                        for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+                            cursor.executemany("""
+                                INSERT INTO temperature_data (station_id, timestamp, temperature)
+                                VALUES (%s, %s, %s)
+                            """ + self.dialect.upsert_clause(["station_id", "timestamp"], ["temperature"]),
+                                rows[start:start + self.INSERT_BATCH_SIZE])
+                        if rows:
+                            first_day = min(row[1] for row in rows).date()
+                            last_day = max(row[1] for row in rows).date()
+                            self._refresh_daily_rollup(cursor, station_id, first_day, last_day + timedelta(days=1))
+                    imported += len(rows)
+
+                if trace_memory:
+                    _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                if trace_memory and not tracing:
+                    tracemalloc.stop()
+                # Upsert міг змінити наявні рядки, тож нова ревізія станції робить її кеш неактуальним
+                if imported:
+                    self._bump_revision(station_id)
+
+            elapsed = time.perf_counter() - started
+            self.last_import_stats = {
+                "rows": imported,
+                "seconds": elapsed,
+                "rows_per_second": imported / elapsed if elapsed > 0 else float("inf"),
+                "peak_memory_mb": peak_memory / (1024 * 1024) if peak_memory is not None else None,
+            }
+            memory = (f", пік пам'яті {self.last_import_stats['peak_memory_mb']:.1f} МБ"
+                      if peak_memory is not None else "")
+            print(f"Імпортовано {imported} записів за {elapsed:.2f} с "
+                  f"({self.last_import_stats['rows_per_second']:.0f} записів/с{memory})")
+            return True
 
         except Exception as e:
             print(f"Помилка при імпорті даних: {e}")
             return False
 
+    def _bump_revision(self, station_id: str):
+        with self.db_cursor() as cursor:
+            cursor.execute("INSERT INTO data_revisions (station_id, revision) VALUES (%s, %s) "
+                           + self.dialect.upsert_clause(["station_id"], ["revision"]),
+                           (station_id, uuid.uuid4().hex))
+
+    def _prepare_chunk(self, chunk: pd.DataFrame, last_temperature: Optional[float],
+                       watermark: Optional[datetime] = None,
+                       station_id: str = DEFAULT_STATION) -> Tuple[List[tuple], Optional[float]]:
+        if last_temperature is not None and pd.isna(chunk[self.DEFAULT_COLUMN].iloc[0]):
+            chunk.loc[chunk.index[0], self.DEFAULT_COLUMN] = last_temperature
+        chunk = self.fill_missing_temperatures(chunk, self.DEFAULT_COLUMN)
+
+        timestamps = pd.to_datetime(chunk["timestamp"], format=self.TIMESTAMP_FORMAT, errors="coerce")
+        valid = timestamps.notna() & chunk[self.DEFAULT_COLUMN].notna()
+        if watermark is not None:
+            valid &= timestamps > pd.Timestamp(watermark)
+
+        timestamps = timestamps[valid].dt.to_pydatetime()
+        rows = list(zip([station_id] * len(timestamps), timestamps,
+                        chunk.loc[valid, self.DEFAULT_COLUMN].astype(float).tolist()))
+        if chunk[self.DEFAULT_COLUMN].notna().any():
+            last_temperature = float(chunk[self.DEFAULT_COLUMN].iloc[-1])
+        return rows, last_temperature
+
+    def _refresh_daily_rollup(self, cursor, station_id: Optional[str] = None,
+                              start: Optional[date] = None, end: Optional[date] = None):
+        query = """
+            INSERT INTO daily_temperature (station_id, date, min_temperature, max_temperature, sample_count)
+            SELECT station_id, DATE(timestamp), MIN(temperature), MAX(temperature), COUNT(*)
+            FROM temperature_data
+            WHERE 1 = 1
+        """
+        params = []
+        if station_id is not None:
+            query += " AND station_id = %s"
+            params.append(station_id)
+        if start is not None and end is not None:
+            query += " AND timestamp >= %s AND timestamp < %s"
+            params.extend([start, end])
+        query += " GROUP BY station_id, DATE(timestamp) " + self.dialect.upsert_clause(
+            ["station_id", "date"], ["min_temperature", "max_temperature", "sample_count"])
+        cursor.execute(query, tuple(params))
+
+    def rebuild_daily_rollup(self):
+        with self.db_cursor() as cursor:
+            cursor.execute("DELETE FROM daily_temperature")
+            self._refresh_daily_rollup(cursor)
+
     @staticmethod
     def fill_missing_temperatures(df: pd.DataFrame, column_name: str) -> pd.DataFrame:
-        df[column_name] = df[column_name].fillna(method="ffill").fillna(method="bfill")
+        df[column_name] = df[column_name].ffill().bfill()
         return df
 
-    def get_all_data(self) -> pd.DataFrame:
-        with self.db_cursor(dictionary=True) as cursor:
-            cursor.execute("SELECT timestamp, temperature FROM temperature_data ORDER BY timestamp")
-            data = cursor.fetchall()
-        return pd.DataFrame(data)
+    def get_stations(self) -> List[str]:
+        with self.db_cursor() as cursor:
+            cursor.execute("SELECT DISTINCT station_id FROM daily_temperature ORDER BY station_id")
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_data_watermark(self, station_id: Optional[str] = DEFAULT_STATION) -> Dict[str, str]:
+        # Ревізію оновлює кожен імпорт станції, тож ключ кешу читається одним рядком, без сканування даних
+        query = "SELECT station_id, revision FROM data_revisions"
+        params = ()
+        if station_id is not None:
+            query += " WHERE station_id = %s"
+            params = (station_id,)
+        with self.db_cursor() as cursor:
+            cursor.execute(query + " ORDER BY station_id", params)
+            return dict(cursor.fetchall())
+
+    def get_all_data(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     station_id: str = DEFAULT_STATION) -> pd.DataFrame:
+        use_cache = self.cache is not None and start is None and end is None
+        if use_cache:
+            watermark = self.get_data_watermark(station_id)
+            cached = self.cache.load(f"temperature_data-{station_id}", watermark)
+            if cached is not None:
+                return self._history_frame(cached)
+
+        frames = list(self.iter_data(start, end, station_id=station_id))
+        df = self._history_frame(pd.concat(frames, ignore_index=True) if frames else {
+            "timestamp": [], self.DEFAULT_COLUMN: []})
+
+        if use_cache:
+            self.cache.store(f"temperature_data-{station_id}", watermark,
+                             {column: df[column].to_numpy() for column in df.columns})
+        return df
+
+    def _history_frame(self, columns) -> pd.DataFrame:
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(columns["timestamp"]).astype("datetime64[ns]"),
+            self.DEFAULT_COLUMN: np.asarray(columns[self.DEFAULT_COLUMN], dtype=np.float32),
+        })
+
+    def iter_data(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  chunk_size: int = READ_CHUNK_SIZE, station_id: str = DEFAULT_STATION) -> Iterator[pd.DataFrame]:
+        query = "SELECT timestamp, temperature FROM temperature_data"
+        conditions, params = ["station_id = %s"], [station_id]
+        if start is not None:
+            conditions.append("timestamp >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("timestamp < %s")
+            params.append(end)
+        query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp"
+
+        with self.raw_connection() as connection:
+            cursor = self.dialect.streaming_cursor(connection)
+            try:
+                cursor.execute(query, tuple(params))
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    timestamps, temperatures = zip(*rows)
+                    yield pd.DataFrame({
+                        "timestamp": pd.to_datetime(list(timestamps)),
+                        self.DEFAULT_COLUMN: np.asarray(temperatures, dtype=np.float32),
+                    })
+            finally:
+                self.dialect.finish_stream(connection)
+                cursor.close()
+
+    def get_daily_data(self, start: Optional[date] = None, end: Optional[date] = None,
+                       station_id: Optional[str] = DEFAULT_STATION) -> pd.DataFrame:
+        cache_name = f"daily_temperature-{station_id if station_id is not None else 'all'}"
+        use_cache = self.cache is not None and start is None and end is None
+        if use_cache:
+            watermark = self.get_data_watermark(station_id)
+            cached = self.cache.load(cache_name, watermark)
+            if cached is not None:
+                return self._daily_frame(cached)
+
+        query = "SELECT station_id, date, min_temperature, max_temperature, sample_count FROM daily_temperature"
+        conditions, params = [], []
+        if station_id is not None:
+            conditions.append("station_id = %s")
+            params.append(station_id)
+        if start is not None:
+            conditions.append("date >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("date < %s")
+            params.append(end)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY station_id, date"
+
+        with self.db_cursor() as cursor:
+            cursor.execute(query, tuple(params))
+            rows = cursor.fetchall()
+
+        df = self._daily_frame(pd.DataFrame(rows, columns=list(self.DAILY_COLUMNS)))
+
+        if use_cache:
+            self.cache.store(cache_name, watermark, {
+                "station_id": df["station_id"].to_numpy(dtype=str),
+                **{column: df[column].to_numpy() for column in self.DAILY_COLUMNS[1:]},
+            })
+        return df
+
+    @staticmethod
+    def _daily_frame(columns) -> pd.DataFrame:
+        # Кеш і запит до бази повертають однакові типи, інакше ключ прогнозу залежав би від того, звідки прийшли дані
+        return pd.DataFrame({
+            "station_id": np.asarray(columns["station_id"], dtype=str).astype(object),
+            "date": pd.to_datetime(columns["date"]).astype("datetime64[ns]"),
+            "min_temperature": np.asarray(columns["min_temperature"], dtype=np.float64),
+            "max_temperature": np.asarray(columns["max_temperature"], dtype=np.float64),
+            "sample_count": np.asarray(columns["sample_count"], dtype=np.int64),
+        })
 
-    def save_predictions(self, predictions: List[Dict[str, Any]], year: int) -> bool:
+    def save_predictions(self, predictions: List[Dict[str, Any]], year: int,
+                         model_version: str = DEFAULT_MODEL_VERSION, station_id: str = DEFAULT_STATION,
+                         forecast_key: Optional[str] = None, start_date: Optional[date] = None) -> bool:
         try:
-            with self.db_cursor() as cursor:
-                cursor.execute("DELETE FROM predictions WHERE YEAR(date) = %s", (year,))
-                start_date = datetime(year, 1, 1)
+            # Прогноз від останнього спостереження покриває лише решту року; старі рядки року видаляються повністю
+            start_date = pd.Timestamp(start_date).date() if start_date is not None else date(year, 1, 1)
+            end_date = max(date(year + 1, 1, 1), start_date + timedelta(days=len(predictions)))
+            rows = [
+                (station_id, start_date + timedelta(days=i), model_version, forecast_key,
+                 float(pred["min_temp"]), float(pred["max_temp"]),
+                 *(float(pred[key]) if pred.get(key) is not None else None for key in self.INTERVAL_KEYS))
+                for i, pred in enumerate(predictions)
+            ]
 
-                for i, pred in enumerate(predictions):
-                    current_date = start_date + pd.Timedelta(days=i)
-                    cursor.execute("""
-                        INSERT INTO predictions (date, min_temperature, max_temperature)
-                        VALUES (%s, %s, %s)
-                    """, (current_date.date(), pred["min_temp"], pred["max_temp"]))
+            with self.db_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM predictions
+                    WHERE station_id = %s AND model_version = %s AND date >= %s AND date < %s
+                """, (station_id, model_version, date(year, 1, 1), end_date))
+                cursor.executemany("""
+                    INSERT INTO predictions (station_id, date, model_version, forecast_key,
+                                             min_temperature, max_temperature,
+                                             min_temperature_low, min_temperature_high,
+                                             max_temperature_low, max_temperature_high, confidence)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, rows)
 
             return True
 
@@ -106,13 +424,42 @@ class DatabaseManager:
             print(f"Помилка при збереженні прогнозів: {e}")
             return False
 
-    def save_model_metadata(self, model_type: str, metrics: Dict[str, float]) -> bool:
+    def get_forecast(self, year: int, forecast_key: str, model_version: str = DEFAULT_MODEL_VERSION,
+                     station_id: str = DEFAULT_STATION) -> Optional[List[Dict[str, float]]]:
+        with self.db_cursor() as cursor:
+            cursor.execute("""
+                SELECT min_temperature, max_temperature, min_temperature_low, min_temperature_high,
+                       max_temperature_low, max_temperature_high, confidence
+                FROM predictions
+                WHERE station_id = %s AND model_version = %s AND date >= %s AND date < %s
+                  AND forecast_key = %s
+                ORDER BY date
+            """, (station_id, model_version, date(year, 1, 1), date(year + 1, 1, 1), forecast_key))
+            rows = cursor.fetchall()
+
+        if not rows:
+            return None
+        forecast = []
+        for min_temp, max_temp, *interval in rows:
+            record = {"min_temp": min_temp, "max_temp": max_temp}
+            if interval[-1] is not None:
+                record.update(zip(self.INTERVAL_KEYS, interval))
+            forecast.append(record)
+        return forecast
+
+    def save_model_metadata(self, model_type: str, metrics: Dict[str, float],
+                            data_watermark: Optional[date] = None,
+                            hyperparameters: Optional[Dict[str, Any]] = None, version: Optional[str] = None,
+                            model_path: Optional[str] = None) -> bool:
         try:
             with self.db_cursor() as cursor:
                 cursor.execute("""
-                    INSERT INTO models_metadata (model_type, training_date, metrics)
-                    VALUES (%s, %s, %s)
-                """, (model_type, datetime.now().date(), json.dumps(metrics)))
+                    INSERT INTO models_metadata
+                        (model_type, training_date, metrics, data_watermark, hyperparameters, version, model_path)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (model_type, datetime.now().date(), json.dumps(metrics), data_watermark,
+                      json.dumps(hyperparameters) if hyperparameters is not None else None,
+                      version, model_path))
 
             return True
 
@@ -120,20 +467,45 @@ class DatabaseManager:
             print(f"Помилка при збереженні метаданих моделі: {e}")
             return False
 
-    def get_predictions_for_month(self, year: int, month: int) -> pd.DataFrame:
+    def get_training_watermark(self, model_type: str = "LSTM") -> Optional[date]:
+        with self.db_cursor() as cursor:
+            cursor.execute("SELECT MAX(data_watermark) FROM models_metadata WHERE model_type = %s", (model_type,))
+            watermark = cursor.fetchone()[0]
+        return pd.Timestamp(watermark).date() if watermark is not None else None
+
+    def get_predictions_for_month(self, year: int, month: int, model_version: Optional[str] = None,
+                                  station_id: str = DEFAULT_STATION) -> pd.DataFrame:
+        start_date = date(year, month, 1)
+        end_date = date(year + month // 12, month % 12 + 1, 1)
+        query = """
+            SELECT date, min_temperature, max_temperature, min_temperature_low, min_temperature_high,
+                   max_temperature_low, max_temperature_high, confidence
+            FROM predictions
+        """
+        if model_version is not None:
+            query += " WHERE station_id = %s AND date >= %s AND date < %s AND model_version = %s"
+            params = [station_id, start_date, end_date, model_version]
+        else:
+            # Без версії на кожну дату береться прогноз, збережений останнім, а не рядок від кожної моделі
+            query += """
+                WHERE id IN (
+                    SELECT MAX(id) FROM predictions
+                    WHERE station_id = %s AND date >= %s AND date < %s
+                    GROUP BY date
+                )
+            """
+            params = [station_id, start_date, end_date]
+        query += " ORDER BY date"
+
         with self.db_cursor(dictionary=True) as cursor:
-            cursor.execute("""
-                SELECT date, min_temperature, max_temperature 
-                FROM predictions 
-                WHERE YEAR(date) = %s AND MONTH(date) = %s 
-                ORDER BY date
-            """, (year, month))
+            cursor.execute(query, tuple(params))
             data = cursor.fetchall()
         return pd.DataFrame(data)
 
     def close(self):
         if self.connection:
             self.connection.close()
+            self.connection = None
 
     def __enter__(self):
         return self
@@ -0,0 +1,83 @@
+import sqlite3
+
+from datetime import date, datetime
+from pathlib import Path
+from typing import Sequence
+
+
+SCHEMA_DIR = Path(__file__).resolve().parent
+
+
+class MySQLDialect:
+    name = "mysql"
+    schema_path = SCHEMA_DIR / "lab3.sql"
+
+    def cursor(self, connection, dictionary: bool = False):
+        return connection.cursor(dictionary=dictionary)
+
+    def streaming_cursor(self, connection):
+        return connection.driver_connection.cursor(buffered=False)
+
+    def finish_stream(self, connection):
+        driver_connection = connection.driver_connection
+        if driver_connection.unread_result:
+            driver_connection.consume_results()
+
+    def upsert_clause(self, keys: Sequence[str], columns: Sequence[str]) -> str:
+        updates = ", ".join(f"{column} = VALUES({column})" for column in columns)
+        return f"ON DUPLICATE KEY UPDATE {updates}"
+
+
+class SQLiteCursor:
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def execute(self, query: str, params: Sequence = ()):
+        return self._cursor.execute(query.replace("%s", "?"), params)
+
+    def executemany(self, query: str, seq_of_params):
+        return self._cursor.executemany(query.replace("%s", "?"), seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SQLiteDialect(MySQLDialect):
+    name = "sqlite"
+    schema_path = SCHEMA_DIR / "lab3_sqlite.sql"
+
+    def __init__(self):
+        sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+        sqlite3.register_adapter(date, lambda value: value.isoformat())
+
+    def cursor(self, connection, dictionary: bool = False):
+        cursor = connection.cursor()
+        if dictionary:
+            cursor.row_factory = lambda cur, row: {
+                column[0]: value for column, value in zip(cur.description, row)
+            }
+        return SQLiteCursor(cursor)
+
+    def streaming_cursor(self, connection):
+        # Курсор sqlite3 і так читає рядки покроково під час fetchmany
+        return SQLiteCursor(connection.driver_connection.cursor())
+
+    def finish_stream(self, connection):
+        pass
+
+    def upsert_clause(self, keys: Sequence[str], columns: Sequence[str]) -> str:
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns)
+        return f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+
+
+DIALECTS = {
+    MySQLDialect.name: MySQLDialect,
+    SQLiteDialect.name: SQLiteDialect,
+}
+
+
+def get_dialect(backend: str):
+    try:
+        return DIALECTS[backend]()
+    except KeyError:
+        raise ValueError(f"Невідомий бекенд бази даних: {backend}")
@@ -3,20 +3,44 @@
 
 
 	CREATE TABLE IF NOT EXISTS temperature_data (
-		id INT AUTO_INCREMENT PRIMARY KEY,
+		station_id VARCHAR(32) NOT NULL DEFAULT 'default',
 		timestamp DATETIME NOT NULL,
 		temperature FLOAT NOT NULL,
 		created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+		PRIMARY KEY (station_id, timestamp),
 		INDEX idx_temperature_data_timestamp (timestamp)
 	);
 
+	CREATE TABLE IF NOT EXISTS daily_temperature (
+		station_id VARCHAR(32) NOT NULL DEFAULT 'default',
+		date DATE NOT NULL,
+		min_temperature FLOAT NOT NULL,
+		max_temperature FLOAT NOT NULL,
+		sample_count INT NOT NULL,
+		updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+		PRIMARY KEY (station_id, date)
+	);
+
+	CREATE TABLE IF NOT EXISTS data_revisions (
+		station_id VARCHAR(32) NOT NULL PRIMARY KEY,
+		revision CHAR(32) NOT NULL
+	);
+
 	CREATE TABLE IF NOT EXISTS predictions (
 		id INT AUTO_INCREMENT PRIMARY KEY,
+		station_id VARCHAR(32) NOT NULL DEFAULT 'default',
 		date DATE NOT NULL,
+		model_version VARCHAR(64) NOT NULL DEFAULT 'default',
+		forecast_key CHAR(40) NULL,
 		min_temperature FLOAT NOT NULL,
 		max_temperature FLOAT NOT NULL,
+		min_temperature_low FLOAT NULL,
+		min_temperature_high FLOAT NULL,
+		max_temperature_low FLOAT NULL,
+		max_temperature_high FLOAT NULL,
+		confidence FLOAT NULL,
 		created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-		INDEX idx_predictions_date (date)
+		UNIQUE KEY uq_predictions_station_date_model (station_id, date, model_version)
 	);
 
 	CREATE TABLE IF NOT EXISTS models_metadata (
@@ -24,5 +48,9 @@
 		model_type VARCHAR(50) NOT NULL,
 		training_date DATE NOT NULL,
 		metrics TEXT NOT NULL,
+		data_watermark DATE NULL,
+		hyperparameters TEXT NULL,
+		version VARCHAR(64) NULL,
+		model_path VARCHAR(255) NULL,
 		created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 	);
\ No newline at end of file
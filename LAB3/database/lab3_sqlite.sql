@@ -0,0 +1,53 @@
+	CREATE TABLE IF NOT EXISTS temperature_data (
+		station_id VARCHAR(32) NOT NULL DEFAULT 'default',
+		timestamp DATETIME NOT NULL,
+		temperature FLOAT NOT NULL,
+		created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+		PRIMARY KEY (station_id, timestamp)
+	) WITHOUT ROWID;
+
+	CREATE INDEX IF NOT EXISTS idx_temperature_data_timestamp ON temperature_data (timestamp);
+
+	CREATE TABLE IF NOT EXISTS daily_temperature (
+		station_id VARCHAR(32) NOT NULL DEFAULT 'default',
+		date DATE NOT NULL,
+		min_temperature FLOAT NOT NULL,
+		max_temperature FLOAT NOT NULL,
+		sample_count INT NOT NULL,
+		updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+		PRIMARY KEY (station_id, date)
+	) WITHOUT ROWID;
+
+	CREATE TABLE IF NOT EXISTS data_revisions (
+		station_id VARCHAR(32) NOT NULL PRIMARY KEY,
+		revision CHAR(32) NOT NULL
+	) WITHOUT ROWID;
+
+	CREATE TABLE IF NOT EXISTS predictions (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		station_id VARCHAR(32) NOT NULL DEFAULT 'default',
+		date DATE NOT NULL,
+		model_version VARCHAR(64) NOT NULL DEFAULT 'default',
+		forecast_key CHAR(40) NULL,
+		min_temperature FLOAT NOT NULL,
+		max_temperature FLOAT NOT NULL,
+		min_temperature_low FLOAT NULL,
+		min_temperature_high FLOAT NULL,
+		max_temperature_low FLOAT NULL,
+		max_temperature_high FLOAT NULL,
+		confidence FLOAT NULL,
+		created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+		UNIQUE (station_id, date, model_version)
+	);
+
+	CREATE TABLE IF NOT EXISTS models_metadata (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		model_type VARCHAR(50) NOT NULL,
+		training_date DATE NOT NULL,
+		metrics TEXT NOT NULL,
+		data_watermark DATE NULL,
+		hyperparameters TEXT NULL,
+		version VARCHAR(64) NULL,
+		model_path VARCHAR(255) NULL,
+		created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+	);
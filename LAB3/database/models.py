@@ -1,7 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Index, ForeignKey, JSON
+from sqlalchemy import Column, Integer, Float, String, Text, Date, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import relationship
 
 
 Base = declarative_base()
@@ -23,37 +22,47 @@ class WeatherData(Base):
         Index("idx_weather_date_hour", "date", "hour", unique=True),
     )
 
+class DailyTemperature(Base):
+    __tablename__ = "daily_temperature"
+
+    station_id = Column(String(32), primary_key=True, default="default")
+    date = Column(Date, primary_key=True)
+    min_temperature = Column(Float, nullable=False)
+    max_temperature = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Prediction(Base):
     __tablename__ = "predictions"
     
     id = Column(Integer, primary_key=True)
-    date = Column(Date, nullable=False, index=True)
-    hour = Column(Integer, nullable=False)
-    predicted_temperature = Column(Float, nullable=False)
+    station_id = Column(String(32), nullable=False, default="default")
+    date = Column(Date, nullable=False)
+    model_version = Column(String(64), nullable=False, default="default")
+    forecast_key = Column(String(40), nullable=True)
+    min_temperature = Column(Float, nullable=False)
+    max_temperature = Column(Float, nullable=False)
+    min_temperature_low = Column(Float, nullable=True)
+    min_temperature_high = Column(Float, nullable=True)
+    max_temperature_low = Column(Float, nullable=True)
+    max_temperature_high = Column(Float, nullable=True)
     confidence = Column(Float, nullable=True)
-    model_id = Column(Integer, ForeignKey("models_metadata.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    
-    model = relationship("ModelMetadata", back_populates="predictions")
 
     __table_args__ = (
-        Index("idx_prediction_date_hour", "date", "hour"),
+        UniqueConstraint("station_id", "date", "model_version", name="uq_predictions_station_date_model"),
     )
 
 class ModelMetadata(Base):
+    # Стовпці збігаються зі схемою lab3.sql: таблицю може створити як ORM, так і DatabaseManager
     __tablename__ = "models_metadata"
     
     id = Column(Integer, primary_key=True)
-    model_path = Column(String, nullable=False)
-    model_type = Column(String, nullable=False)
-    version = Column(String, nullable=False)
-    metrics = Column(JSON, nullable=False)
-    hyperparameters = Column(JSON, nullable=True)
+    model_type = Column(String(50), nullable=False)
+    training_date = Column(Date, nullable=False)
+    metrics = Column(Text, nullable=False)
+    data_watermark = Column(Date, nullable=True)
+    hyperparameters = Column(Text, nullable=True)
+    version = Column(String(64), nullable=True)
+    model_path = Column(String(255), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    predictions = relationship("Prediction", back_populates="model")
-
-    __table_args__ = (
-        Index("idx_model_created_at", "created_at"),
-    ) 
\ No newline at end of file
@@ -1,11 +1,19 @@
 import sys
+from core.startup import startup_profiler
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication
+startup_profiler.mark("імпорт PySide6")
 from ui.main_window import MainWindow
+startup_profiler.mark("імпорт інтерфейсу")
 
 def main():
     app = QApplication(sys.argv)
     window = MainWindow()
+    startup_profiler.mark("створення вікна")
     window.show()
+    startup_profiler.mark("показ вікна")
+    # Модель завантажується у фоні вже після появи вікна
+    QTimer.singleShot(0, window.start_background_loading)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
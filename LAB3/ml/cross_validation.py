@@ -0,0 +1,121 @@
+import os
+import keras
+import multiprocessing
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.model_selection import KFold
+
+from core.config import ModelConfig
+from ml.datasets import WindowDataset
+from ml.metrics import regression_metrics
+
+
+def init_worker(tf_threads):
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(tf_threads)
+
+
+def worker_pool(n_tasks, workers=None, tf_threads=1):
+    if not workers:
+        workers = min(n_tasks, max(1, (os.cpu_count() or 1) // tf_threads))
+    # spawn замість fork: TensorFlow не підтримує fork після ініціалізації
+    context = multiprocessing.get_context("spawn")
+    return workers, ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                        initializer=init_worker, initargs=(tf_threads,))
+
+
+def _train_fold(task):
+    from ml.lstm_model import build_model, training_callbacks
+
+    config = task['config']
+    keras.mixed_precision.set_global_policy(config.mixed_precision)
+    keras.utils.set_random_seed(task['seed'] + task['fold'])
+    features, sequence_length = task['features'], task['sequence_length']
+
+    # Кожна складка навчає власну нову модель, тож складки незалежні
+    model = build_model((sequence_length, 4), task['learning_rate'], config.jit_compile,
+                        config.lstm_units, config.dense_units)
+    history = model.fit(
+        WindowDataset(features, sequence_length, task['train_idx'], batch_size=task['batch_size'], workers=1),
+        validation_data=WindowDataset(features, sequence_length, task['val_idx'],
+                                      batch_size=task['batch_size'], shuffle=False, workers=1),
+        epochs=task['epochs'],
+        callbacks=training_callbacks(config),
+        verbose=0
+    )
+
+    predicted = model.predict(
+        WindowDataset(features, sequence_length, task['val_idx'], batch_size=task['batch_size'],
+                      shuffle=False, workers=1),
+        verbose=0
+    )
+    actual = features[task['val_idx'] + sequence_length, :2]
+
+    return {
+        'fold': task['fold'],
+        'history': history.history,
+        'metrics': regression_metrics(actual, predicted, task['scaler']),
+        'weights': model.get_weights()
+    }
+
+
+def build_ensemble(fold_weights, sequence_length, learning_rate, config=None):
+    from ml.lstm_model import build_model
+
+    config = config or ModelConfig()
+    inputs = keras.Input((sequence_length, 4))
+    outputs = []
+    for weights in fold_weights:
+        member = build_model((sequence_length, 4), learning_rate, lstm_units=config.lstm_units,
+                             dense_units=config.dense_units)
+        member.build((None, sequence_length, 4))
+        member.set_weights(weights)
+        outputs.append(member(inputs))
+
+    ensemble = keras.Model(inputs, keras.layers.Average()(outputs) if len(outputs) > 1 else outputs[0])
+    ensemble.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss=keras.losses.Huber(),
+        metrics=['mae']
+    )
+    return ensemble
+
+
+def run_cross_validation(features, scaler, sequence_length, learning_rate, epochs=100, batch_size=32,
+                         n_splits=5, workers=None, tf_threads=1, ensemble=False, seed=42, config=None):
+    config = config or ModelConfig()
+    n_windows = len(features) - sequence_length
+    kf = KFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    tasks = [
+        {
+            'fold': fold,
+            'features': features,
+            'scaler': scaler,
+            'sequence_length': sequence_length,
+            'learning_rate': learning_rate,
+            'epochs': epochs,
+            'batch_size': batch_size,
+            'train_idx': train_idx,
+            'val_idx': val_idx,
+            'seed': seed,
+            'config': config
+        }
+        for fold, (train_idx, val_idx) in enumerate(kf.split(np.arange(n_windows)))
+    ]
+
+    workers, executor = worker_pool(n_splits, workers, tf_threads)
+    print(f"Крос-валідація: {n_splits} складок, {workers} процесів по {tf_threads} потоків TensorFlow")
+
+    with executor:
+        results = list(executor.map(_train_fold, tasks))
+
+    for result in results:
+        print(f"Складка {result['fold']}: {result['metrics']}")
+
+    ensemble_model = None
+    if ensemble:
+        ensemble_model = build_ensemble([result['weights'] for result in results], sequence_length, learning_rate,
+                                        config)
+    return results, ensemble_model
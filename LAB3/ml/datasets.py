@@ -0,0 +1,36 @@
+import math
+import keras
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class WindowDataset(keras.utils.PyDataset):
+
+    def __init__(self, features, sequence_length, indices=None, batch_size=32, shuffle=True, seed=42,
+                 workers=2, max_queue_size=8):
+        # workers > 1 вмикає фонову підготовку батчів (prefetch) у Keras
+        super().__init__(workers=workers, use_multiprocessing=False, max_queue_size=max_queue_size)
+        self.features = features
+        self.sequence_length = sequence_length
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+        n_windows = len(features) - sequence_length
+        self.windows = sliding_window_view(features, (sequence_length, features.shape[1]))[:n_windows, 0]
+        self.indices = np.arange(n_windows) if indices is None else np.array(indices)
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
+
+    def __len__(self):
+        return math.ceil(len(self.indices) / self.batch_size)
+
+    def __getitem__(self, idx):
+        batch = self.indices[idx * self.batch_size:(idx + 1) * self.batch_size]
+        # Вікна копіюються лише для поточного батчу, повний тензор (N, seq_len, 4) не створюється
+        return self.windows[batch], self.features[batch + self.sequence_length, :2]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
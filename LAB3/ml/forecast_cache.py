@@ -0,0 +1,73 @@
+import hashlib
+import json
+import threading
+import numpy as np
+
+from collections import OrderedDict
+
+
+class ForecastCache:
+
+    def __init__(self, db_manager, capacity=32):
+        self.db_manager = db_manager
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._artifact_hashes = {}
+        self._lock = threading.Lock()
+
+    def _artifact_hash(self, model):
+        model_path = model.artifact_path
+        if model_path is not None and model_path.exists():
+            stat = model_path.stat()
+            signature = (str(model_path), stat.st_mtime_ns, stat.st_size)
+            if signature not in self._artifact_hashes:
+                with open(model_path, 'rb') as file:
+                    self._artifact_hashes[signature] = hashlib.sha1(file.read()).hexdigest()
+            return self._artifact_hashes[signature]
+
+        # Модель ще не збережена на диск, тож ключем слугують самі ваги
+        digest = hashlib.sha1()
+        for weights in model.model.get_weights():
+            digest.update(np.ascontiguousarray(weights).tobytes())
+        return digest.hexdigest()
+
+    def make_key(self, model, last_sequence, year, start_date=None):
+        digest = hashlib.sha1()
+        digest.update(self._artifact_hash(model).encode())
+        digest.update(json.dumps(model.scaler, sort_keys=True, default=float).encode())
+        digest.update(np.ascontiguousarray(last_sequence, dtype=np.float32).tobytes())
+        digest.update(f"{year}:{start_date}".encode())
+        # Прогноз з інтервалами та без них — різні записи
+        digest.update(f"{model.config.mc_samples}:{model.config.prediction_interval}".encode())
+        return digest.hexdigest()
+
+    def get(self, key, year, station_id=None, model_version=None):
+        station_id = station_id or self.db_manager.DEFAULT_STATION
+        with self._lock:
+            if (key, station_id) in self._entries:
+                self._entries.move_to_end((key, station_id))
+                return self._entries[(key, station_id)]
+
+        predictions = self.db_manager.get_forecast(year, key, model_version or self.db_manager.DEFAULT_MODEL_VERSION,
+                                                   station_id=station_id)
+        if predictions is not None:
+            self.remember(key, station_id, predictions)
+        return predictions
+
+    def put(self, key, year, predictions, station_id=None, start_date=None, model_version=None):
+        station_id = station_id or self.db_manager.DEFAULT_STATION
+        self.remember(key, station_id, predictions)
+        return self.db_manager.save_predictions(predictions, year,
+                                                model_version or self.db_manager.DEFAULT_MODEL_VERSION,
+                                                station_id=station_id, forecast_key=key, start_date=start_date)
+
+    def remember(self, key, station_id, predictions):
+        with self._lock:
+            self._entries[(key, station_id)] = predictions
+            self._entries.move_to_end((key, station_id))
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
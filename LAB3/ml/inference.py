@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from ml.numpy_runtime import NumpyLSTM, model_members
+
+
+class ForecastEngine:
+
+    def __init__(self, model, scaler, sequence_length, seed=None):
+        self.model = model
+        self.scaler = scaler
+        self.sequence_length = sequence_length
+        if scaler is not None:
+            self.mean = np.array([scaler['min']['mean'], scaler['max']['mean']], dtype=np.float32)
+            self.std = np.array([scaler['min']['std'], scaler['max']['std']], dtype=np.float32)
+        else:
+            self.mean = np.zeros(2, dtype=np.float32)
+            self.std = np.ones(2, dtype=np.float32)
+        if isinstance(model, NumpyLSTM):
+            self.rng = np.random.default_rng(seed)
+            self._step = model
+            self._sample_step = lambda x: model(x, rng=self.rng)
+        else:
+            import tensorflow as tf
+            # Один скомпільований граф на крок замість model.predict з його накладними витратами на кожен виклик
+            signature = [tf.TensorSpec((None, sequence_length, 4), tf.float32)]
+            self._step = tf.function(self._call, input_signature=signature)
+            self._sample_step = tf.function(self._sample_call, input_signature=signature)
+
+    def _call(self, x):
+        return self.model(x, training=False)
+
+    def _sample_call(self, x):
+        import keras
+
+        # MC dropout: training=True вмикається лише для Dropout, бо BatchNorm у режимі навчання
+        # рахував би статистику по батчу з K копій замість збережених ковзних середніх
+        outputs = []
+        for member in model_members(self.model):
+            h = x
+            for layer in member.layers:
+                h = layer(h, training=isinstance(layer, keras.layers.Dropout))
+            outputs.append(h)
+        return outputs[0] if len(outputs) == 1 else keras.ops.mean(keras.ops.stack(outputs), axis=0)
+
+    def step(self, x):
+        return np.asarray(self._step(x))
+
+    def sample_step(self, x):
+        return np.asarray(self._sample_step(x))
+
+    @staticmethod
+    def month_features(start_date, horizon):
+        months = pd.date_range(start_date, periods=horizon, freq='D').month.to_numpy()
+        return np.stack([
+            np.sin(2 * np.pi * months / 12),
+            np.cos(2 * np.pi * months / 12),
+        ], axis=1).astype(np.float32)
+
+    def forecast(self, last_sequences, start_date, horizon):
+        sequences = np.asarray(last_sequences, dtype=np.float32)
+        return self._rollout(sequences, start_date, horizon, self.step) * self.std + self.mean
+
+    def forecast_quantiles(self, last_sequences, start_date, horizon, samples=32, quantiles=(0.05, 0.5, 0.95)):
+        sequences = np.asarray(last_sequences, dtype=np.float32)
+        n_sequences = len(sequences)
+        # K стохастичних траєкторій кожної послідовності йдуть одним батчем (n * K, length, 4):
+        # на кожен крок припадає один прямий прохід, а не K окремих циклів predict
+        paths = self._rollout(np.repeat(sequences, samples, axis=0), start_date, horizon, self.sample_step)
+        paths = (paths * self.std + self.mean).reshape(n_sequences, samples, horizon, 2)
+        return np.quantile(paths, quantiles, axis=1).astype(np.float32)
+
+    def _rollout(self, sequences, start_date, horizon, step_fn):
+        n_sequences, length, n_features = sequences.shape
+        months = self.month_features(start_date, horizon)
+
+        # Подвоєний кільцевий буфер: кожен рядок зберігається двічі (i та i + length),
+        # тож поточне вікно завжди є суцільним зрізом buffer[:, head:head + length] без np.roll
+        buffer = np.concatenate([sequences, sequences], axis=1)
+        predictions = np.empty((n_sequences, horizon, 2), dtype=np.float32)
+        head = 0
+
+        for step in range(horizon):
+            window = buffer[:, head:head + length]
+            window[:, :, 2:] = months[step]
+
+            pred = np.sort(step_fn(window), axis=1)
+            predictions[:, step] = pred
+
+            buffer[:, head, :2] = pred
+            buffer[:, head + length, :2] = pred
+            head = (head + 1) % length
+
+        return predictions
+
+    def forecast_years(self, last_sequences, start_date, last_year, samples=0, quantiles=(0.05, 0.5, 0.95)):
+        # Один прогін від дня після останнього спостереження до кінця last_year, розрізаний по роках;
+        # перший рік може бути неповним, якщо історія закінчується посеред нього
+        start_date = pd.Timestamp(start_date).normalize()
+        horizon = self.horizon(start_date, last_year)
+        if samples > 0:
+            predictions = self.forecast_quantiles(last_sequences, start_date, horizon, samples, quantiles)
+        else:
+            predictions = self.forecast(last_sequences, start_date, horizon)
+
+        years = pd.date_range(start_date, periods=horizon, freq='D').year.to_numpy()
+        return {year: predictions[..., years == year, :] for year in range(start_date.year, last_year + 1)}
+
+    @staticmethod
+    def horizon(start_date, last_year):
+        start_date = pd.Timestamp(start_date).normalize()
+        if last_year < start_date.year:
+            raise ValueError(f"Рік {last_year} уже є в історії: прогноз починається з {start_date:%Y-%m-%d}")
+        return (pd.Timestamp(last_year + 1, 1, 1) - start_date).days
+
+    @staticmethod
+    def year_start(start_date, year):
+        return max(pd.Timestamp(start_date).normalize(), pd.Timestamp(year, 1, 1)).date()
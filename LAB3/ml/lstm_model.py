@@ -1,220 +1,678 @@
-import keras
 import numpy as np
 import pandas as pd
-import joblib
 import os
+import threading
+import time
 
 from datetime import datetime
-from sklearn.model_selection import KFold
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from numpy.lib.stride_tricks import sliding_window_view
 
 from core.config import ModelConfig
+from ml.registry import ModelRegistry
+
+# keras/tensorflow, sklearn та joblib імпортуються в методах: їх завантаження займає секунди
+# і не повинне затримувати запуск застосунку
+
+
+def build_model(input_shape, learning_rate, jit_compile="auto", lstm_units=(128, 64), dense_units=32):
+    import keras
+
+    model = keras.Sequential([
+        keras.layers.Bidirectional(keras.layers.LSTM(lstm_units[0], input_shape=input_shape, return_sequences=True)),
+        keras.layers.BatchNormalization(),
+        keras.layers.Dropout(0.3),
+        keras.layers.Bidirectional(keras.layers.LSTM(lstm_units[1])),
+        keras.layers.BatchNormalization(),
+        keras.layers.Dropout(0.3),
+        keras.layers.Dense(dense_units, activation='relu'),
+        # Вихід завжди у float32, навіть за змішаної точності
+        keras.layers.Dense(2, dtype='float32')
+    ])
+    
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss=keras.losses.Huber(),
+        metrics=['mae'],
+        jit_compile={"true": True, "false": False}.get(jit_compile, "auto")
+    )
+    
+    return model
+
+
+def configure_runtime(config):
+    import keras
+    import tensorflow as tf
+
+    # Кількість потоків можна задати лише до першої операції TensorFlow
+    try:
+        if config.intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(config.intra_op_threads)
+        if config.inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(config.inter_op_threads)
+    except RuntimeError as e:
+        print(f"Не вдалося змінити кількість потоків TensorFlow: {e}")
+
+    keras.mixed_precision.set_global_policy(config.mixed_precision)
+
+
+def training_callbacks(config):
+    import keras
+
+    return [
+        keras.callbacks.EarlyStopping(
+            monitor='val_loss',
+            patience=config.early_stopping_patience,
+            restore_best_weights=True
+        ),
+        keras.callbacks.ReduceLROnPlateau(
+            monitor='val_loss',
+            factor=0.5,
+            patience=config.reduce_lr_patience,
+            min_lr=1e-6
+        )
+    ]
+
 
 class TemperatureLSTM:
+    # Стан моделі: завантаження -> прогрів -> готова; перевірка повторюється лише після заміни моделі
+    STATE_UNLOADED = "unloaded"
+    STATE_LOADED = "loaded"
+    STATE_READY = "ready"
+    STATE_FAILED = "failed"
     
     def __init__(self, config: ModelConfig):
+        self.config = config
         self.sequence_length = config.sequence_length
         self.model_path = config.model_path
         self.learning_rate = config.learning_rate
         self.scaler_path = self.model_path.parent / "temperature_scaler.pkl"
-
-        if self.model_path.exists():
-            print(f"Завантаження моделі з {self.model_path}")
-            self.model = keras.models.load_model(self.model_path)
-        else:
-            print(f"Модель не знайдено, створюється нова")
-            self.model = None 
+        self.numpy_model_path = config.numpy_model_path
+        self._forecast_engine = None
+        self._model = None
+        self._model_loaded = False
+        self._load_lock = threading.Lock()
+        self._ready_lock = threading.Lock()
+        self.state = self.STATE_UNLOADED
+        self._loader = None
+        self.load_timings = {}
+        if config.inference_precision != "float32" and config.runtime != "numpy":
+            print(f"Попередження: INFERENCE_PRECISION={config.inference_precision} діє лише з MODEL_RUNTIME=numpy, "
+                  f"модель Keras працює у float32")
+        self.registry = ModelRegistry(config.registry_dir, config.resident_models, config.registry_keep,
+                                      config.runtime, config.inference_precision)
+        self.version = self.registry.active_version
+        self._artifact_path = None
+        if self.version is not None:
+            # Активна версія реєстру має пріоритет над файлами моделі поза реєстром
+            self.scaler_path = self.registry.path(self.version) / ModelRegistry.SCALER_FILE
             
         if self.scaler_path.exists():
             print(f"Завантаження scaler з {self.scaler_path}")
+            import joblib
             self.scaler = joblib.load(self.scaler_path)
         else:
             print(f"Scaler не знайдено")
             self.scaler = None
+
+    @property
+    def model(self):
+        if not self._model_loaded:
+            self.load()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        with self._load_lock:
+            self._model = model
+            self._model_loaded = True
+            self.state = self.STATE_LOADED
+            # Модель замінено в пам'яті: файлу, що їй відповідає, поки немає
+            self._artifact_path = None
+
+    def load(self):
+        # Якщо модель вже завантажується у фоновому потоці, блокування дочекається її
+        with self._load_lock:
+            if self._model_loaded:
+                return self._model
+
+            numpy_runtime = self.config.runtime == "numpy" and (
+                self.version is not None or self.numpy_model_path.exists())
+            if not numpy_runtime:
+                started = time.perf_counter()
+                import keras
+                configure_runtime(self.config)
+                self.load_timings['import_keras'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            if self.version is not None:
+                print(f"Завантаження моделі {self.version} з реєстру {self.registry.root}")
+                self._model, self.scaler, self.sequence_length = self.registry.load(self.version)
+                self.load_timings['load_model'] = time.perf_counter() - started
+                self._artifact_path = self.registry.path(self.version) / ModelRegistry.MODEL_FILE
+            elif numpy_runtime:
+                from ml.numpy_runtime import NumpyLSTM
+
+                print(f"Завантаження NumPy-моделі з {self.numpy_model_path}")
+                self._model = NumpyLSTM.load(self.numpy_model_path, precision=self.config.inference_precision)
+                self.load_timings['load_model'] = time.perf_counter() - started
+                if self._model.scaler is not None:
+                    self.scaler = self._model.scaler
+                self._artifact_path = self.numpy_model_path
+            elif self.model_path.exists():
+                print(f"Завантаження моделі з {self.model_path}")
+                self._model = keras.models.load_model(self.model_path)
+                self.load_timings['load_model'] = time.perf_counter() - started
+                self._artifact_path = self.model_path
+            else:
+                print(f"Модель не знайдено, створюється нова")
+                self._model = None
+
+            self._model_loaded = True
+            self.state = self.STATE_LOADED
+            return self._model
+
+    def load_async(self, on_loaded=None):
+        if self._loader is not None or self._model_loaded:
+            return self._loader
+
+        def run():
+            try:
+                self.load()
+            except Exception as e:
+                print(f"Помилка фонового завантаження моделі: {e}")
+                return
+            if on_loaded is not None:
+                on_loaded()
+
+        self._loader = threading.Thread(target=run, name="model-loader", daemon=True)
+        self._loader.start()
+        return self._loader
     
-    def health_check(self) -> bool:
+    @property
+    def artifact_path(self):
+        # Шлях відомий лише після завантаження; без нього ключ прогнозу рахувався б за вагами і відрізнявся б
+        if not self._model_loaded:
+            self.load()
+        return self._artifact_path
+
+    def save(self, model=None, metrics=None, hyperparameters=None):
+        model = model if model is not None else self.model
+        version = self.registry.register(model, self.scaler, self.sequence_length, metrics, hyperparameters)
+        if self.config.runtime == "numpy":
+            # Навчалася Keras-модель, а обслуговує NumpyLSTM тієї ж версії, завантажена з реєстру
+            self.swap(*self.registry.load(version), version)
+        elif model is self._model:
+            self.version = version
+            self._artifact_path = self.registry.path(version) / ModelRegistry.MODEL_FILE
+        else:
+            self.swap(model, self.scaler, self.sequence_length, version)
+        self.registry.activate(version)
+        self.scaler_path = self.registry.path(version) / ModelRegistry.SCALER_FILE
+        return version
+
+    def swap(self, model, scaler, sequence_length, version=None):
+        from ml.inference import ForecastEngine
 
-        try:
-            if self.model is None:
+        # Нова модель прогрівається до публікації, тож запити не чекають на трасування графа
+        engine = ForecastEngine(model, scaler, sequence_length)
+        engine.step(np.zeros((1, sequence_length, 4), dtype=np.float32))
+
+        with self._load_lock:
+            self._model = model
+            self.scaler = scaler
+            self.sequence_length = sequence_length
+            self._forecast_engine = engine
+            self.version = version
+            self._artifact_path = self.registry.path(version) / ModelRegistry.MODEL_FILE if version else None
+            self._model_loaded = True
+            self.state = self.STATE_READY
+
+    def promote(self, version):
+        self.swap(*self.registry.load(version), version)
+        self.registry.activate(version)
+        print(f"Активна модель: {version}")
+        return version
+
+    def rollback(self):
+        version = self.registry.previous_version
+        if version is None:
+            raise ValueError("Немає попередньої версії моделі для відкату")
+        self.swap(*self.registry.load(version), version)
+        self.registry.activate(version, rollback=True)
+        print(f"Модель відкочено до {version}")
+        return version
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == self.STATE_READY
+
+    def warm_up(self, batch_sizes=(1,)) -> bool:
+        with self._ready_lock:
+            if self.is_ready:
+                return True
+
+            try:
+                if self.model is None:
+                    self.state = self.STATE_FAILED
+                    return False
+
+                # Трасування графа та перший виклик виконуються тут, а не під час першого прогнозу
+                started = time.perf_counter()
+                for batch_size in batch_sizes:
+                    self.forecast_engine.step(np.zeros((batch_size, self.sequence_length, 4), dtype=np.float32))
+                if self.config.mc_samples > 0:
+                    self.forecast_engine.sample_step(
+                        np.zeros((self.config.mc_samples, self.sequence_length, 4), dtype=np.float32))
+                self.load_timings['warm_up'] = time.perf_counter() - started
+                self.state = self.STATE_READY
+                return True
+            except Exception as e:
+                print(f"Помилка перевірки моделі: {e}")
+                self.state = self.STATE_FAILED
                 return False
 
-            test_input = np.zeros((1, self.sequence_length, 4))
-            self.model.predict(test_input, verbose=0)
-            return True
-        except Exception as e:
-            print(f"Помилка перевірки моделі: {e}")
-            return False
+    def health_check(self, revalidate=False) -> bool:
+        if revalidate:
+            with self._ready_lock:
+                if self.state == self.STATE_READY:
+                    self.state = self.STATE_LOADED
+        return self.is_ready or self.warm_up()
 
-    def create_model(self, input_shape):
-        model = keras.Sequential([
-            keras.layers.Bidirectional(keras.layers.LSTM(128, input_shape=input_shape, return_sequences=True)),
-            keras.layers.BatchNormalization(),
-            keras.layers.Dropout(0.3),
-            keras.layers.Bidirectional(keras.layers.LSTM(64)),
-            keras.layers.BatchNormalization(),
-            keras.layers.Dropout(0.3),
-            keras.layers.Dense(32, activation='relu'),
-            keras.layers.Dense(2)
-        ])
-        
-        model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=self.learning_rate),
-            loss=keras.losses.Huber(),
-            metrics=['mae']
+    def export_numpy(self, path=None):
+        from ml.numpy_runtime import export_npz
+
+        path = path or self.numpy_model_path
+        export_npz(self.model, self.scaler, self.sequence_length, path, self.config.inference_precision)
+        print(f"Ваги для NumPy-інференсу ({self.config.inference_precision}) збережено у {path}")
+        return path
+
+    def compare_precision(self, X, y, precisions=None, repeats=20):
+        from ml.numpy_runtime import PRECISIONS, export_arrays, precision_report
+
+        report = precision_report(
+            export_arrays(self.model, self.scaler, self.sequence_length), X, y,
+            precisions=precisions or PRECISIONS,
+            repeats=repeats
         )
-        
+        for precision, result in report.items():
+            print(f"{precision:>8}: {result['latency_ms']:.2f} мс, ваги {result['weights_mb']:.2f} МБ "
+                  f"(файл {result['file_mb']:.2f} МБ), "
+                  f"дрейф MAE min/max {result['drift']['min_temp']['mae']:+.4f}/{result['drift']['max_temp']['mae']:+.4f}, "
+                  f"дрейф R² min/max {result['drift']['min_temp']['r2']:+.4f}/{result['drift']['max_temp']['r2']:+.4f}")
+        return report
+
+    def create_model(self, input_shape):
+        model = build_model(input_shape, self.learning_rate, self.config.jit_compile,
+                            self.config.lstm_units, self.config.dense_units)
         self.model = model
         return model
     
-    def prepare_data(self, df):
+    @staticmethod
+    def aggregate_daily(chunks):
+        parts = []
+        for chunk in chunks:
+            days = pd.to_datetime(chunk['timestamp']).dt.floor('D')
+            parts.append(chunk.groupby(days)['temperature'].agg(['min', 'max']))
 
-        if isinstance(df.index, pd.DatetimeIndex):
-            df = df.reset_index()
-        
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df.set_index('timestamp', inplace=True)
-        
-        daily_data = df.resample('D').agg({
-            'temperature': ['min', 'max']
-        })
+        if not parts:
+            return pd.DataFrame(columns=pd.MultiIndex.from_product([['temperature'], ['min', 'max']]),
+                                index=pd.DatetimeIndex([], name='timestamp'))
+
+        # Чанки відсортовані за часом, тож один день може бути розбитий лише між сусідніми чанками
+        daily_data = pd.concat(parts).groupby(level=0).agg({'min': 'min', 'max': 'max'}).asfreq('D')
+        daily_data.columns = pd.MultiIndex.from_product([['temperature'], daily_data.columns])
+        return daily_data
+
+    @staticmethod
+    def from_daily_rollup(daily_df):
+        daily_data = pd.DataFrame({
+            ('temperature', 'min'): daily_df['min_temperature'].to_numpy(dtype=float),
+            ('temperature', 'max'): daily_df['max_temperature'].to_numpy(dtype=float),
+        }, index=pd.DatetimeIndex(pd.to_datetime(daily_df['date']), name='timestamp'))
+        return daily_data.asfreq('D') if len(daily_data) else daily_data
+
+    def to_daily(self, df):
+        if isinstance(df, pd.DataFrame) and 'min_temperature' in df.columns:
+            return self.from_daily_rollup(df)
+
+        if isinstance(df, pd.DataFrame):
+            if isinstance(df.index, pd.DatetimeIndex):
+                df = df.reset_index()
+
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            df.set_index('timestamp', inplace=True)
+
+            return df.resample('D').agg({
+                'temperature': ['min', 'max']
+            })
+
+        return self.aggregate_daily(df)
+
+    @staticmethod
+    def fit_scaler(min_values, max_values):
+        return {
+            'min': {'mean': min_values.mean(), 'std': min_values.std()},
+            'max': {'mean': max_values.mean(), 'std': max_values.std()}
+        }
+
+    def prepare_data(self, df):
+        daily_data = self.to_daily(df)
         
         print(f"Кількість днів після групування: {len(daily_data)}")
         
-        daily_data['month'] = daily_data.index.month
-        daily_data['month_sin'] = np.sin(2 * np.pi * daily_data['month'] / 12)
-        daily_data['month_cos'] = np.cos(2 * np.pi * daily_data['month'] / 12)
-        
         if self.scaler is None:
-            self.scaler = {
-                'min': {'mean': daily_data[('temperature', 'min')].mean(),
-                       'std': daily_data[('temperature', 'min')].std()},
-                'max': {'mean': daily_data[('temperature', 'max')].mean(),
-                       'std': daily_data[('temperature', 'max')].std()}
-            }
-        
-        normalized_data = pd.DataFrame({
-            'min_temp': (daily_data[('temperature', 'min')] - 
-                        self.scaler['min']['mean']) / self.scaler['min']['std'],
-            'max_temp': (daily_data[('temperature', 'max')] - 
-                        self.scaler['max']['mean']) / self.scaler['max']['std'],
-            'month_sin': daily_data['month_sin'],
-            'month_cos': daily_data['month_cos']
-        })
-        
-        if len(normalized_data) < self.sequence_length:
-            self.sequence_length = len(normalized_data) - 1
+            self.scaler = self.fit_scaler(daily_data[('temperature', 'min')], daily_data[('temperature', 'max')])
+
+        if len(daily_data) < self.sequence_length:
+            self.sequence_length = len(daily_data) - 1
+
+        return self.make_windows(daily_data)
+
+    def prepare_features(self, df):
+        daily_data = self.to_daily(df)
+
+        print(f"Кількість днів після групування: {len(daily_data)}")
+
+        if self.scaler is None:
+            self.scaler = self.fit_scaler(daily_data[('temperature', 'min')], daily_data[('temperature', 'max')])
+
+        return self.make_features(daily_data)
+
+    def prepare_stations(self, daily_df):
+        if self.scaler is None:
+            self.scaler = self.fit_scaler(daily_df['min_temperature'], daily_df['max_temperature'])
+
+        # Довжина вікна спільна для всіх станцій, тож станції з коротшою історією пропускаються
+        sequence_length = self.sequence_length
+        windows = {}
+        for station_id, station_df in daily_df.groupby('station_id', sort=True):
+            if len(station_df) < sequence_length + 1:
+                print(f"Станцію {station_id} пропущено: {len(station_df)} днів даних, "
+                      f"потрібно щонайменше {sequence_length + 1}")
+                continue
+            print(f"Станція {station_id}:")
+            windows[station_id] = self.make_windows(self.from_daily_rollup(station_df), sequence_length)
+        return windows
+
+    def last_window(self, df):
+        # На відміну від X[-1] з make_windows, вікно закінчується останнім спостереженим днем,
+        # тож прогноз починається з наступного дня
+        daily_data = self.to_daily(df)
+        if self.scaler is None:
+            self.scaler = self.fit_scaler(daily_data[('temperature', 'min')], daily_data[('temperature', 'max')])
+        if len(daily_data) < self.sequence_length:
+            raise ValueError(f"Недостатньо даних: {len(daily_data)} днів, потрібно {self.sequence_length}")
+
+        features = self.make_features(daily_data.iloc[-self.sequence_length:])
+        return features[np.newaxis], daily_data.index[-1] + pd.Timedelta(days=1)
+
+    def make_features(self, daily_data):
+        months = daily_data.index.month.to_numpy()
+        features = np.empty((len(daily_data), 4), dtype=np.float32)
+        features[:, 0] = (daily_data[('temperature', 'min')].to_numpy(dtype=float) -
+                          self.scaler['min']['mean']) / self.scaler['min']['std']
+        features[:, 1] = (daily_data[('temperature', 'max')].to_numpy(dtype=float) -
+                          self.scaler['max']['mean']) / self.scaler['max']['std']
+        features[:, 2] = np.sin(2 * np.pi * months / 12)
+        features[:, 3] = np.cos(2 * np.pi * months / 12)
+        return features
+
+    def make_windows(self, daily_data, sequence_length=None):
+        sequence_length = self.sequence_length if sequence_length is None else sequence_length
+        features = self.make_features(daily_data)
         
-        X, y = [], []
-        for i in range(len(normalized_data) - self.sequence_length):
-            X.append(normalized_data.iloc[i:(i + self.sequence_length)].values)
-            y.append(normalized_data.iloc[i + self.sequence_length][['min_temp', 'max_temp']].values)
+        # X - це представлення (view) над features без копіювання; копія робиться лише під час навчання
+        n_windows = max(len(features) - sequence_length, 0)
+        if n_windows > 0:
+            X = sliding_window_view(features, (sequence_length, 4))[:n_windows, 0]
+        else:
+            X = np.empty((0, max(sequence_length, 0), 4), dtype=np.float32)
+        y = features[sequence_length:sequence_length + n_windows, :2]
         
         print(f"Кількість послідовностей для навчання: {len(X)}")
-        print(f"Довжина послідовності: {self.sequence_length}")
-        print(f"Форма X: {np.array(X).shape if len(X) > 0 else (0,)}")
-        print(f"Форма y: {np.array(y).shape if len(y) > 0 else (0,)}")
+        print(f"Довжина послідовності: {sequence_length}")
+        print(f"Форма X: {X.shape}")
+        print(f"Форма y: {y.shape}")
             
-        return np.array(X), np.array(y)
+        return X, y
     
-    def train(self, X, y, epochs=100, batch_size=32, n_splits=5):
-        if self.model is None:
-            self.create_model((self.sequence_length, 4)) 
-        
+    def _array_dataset(self, X, y, batch_size, shuffle):
+        import tensorflow as tf
+
+        dataset = tf.data.Dataset.from_tensor_slices((X, y))
+        if self.config.cache_dataset:
+            dataset = dataset.cache()
+        if shuffle:
+            dataset = dataset.shuffle(len(X), seed=42, reshuffle_each_iteration=True)
+        return dataset.batch(batch_size).prefetch(self.config.prefetch_batches or tf.data.AUTOTUNE)
+
+    def _window_dataset(self, features, indices, batch_size, shuffle=True):
+        from ml.datasets import WindowDataset
+
+        return WindowDataset(features, self.sequence_length, indices, batch_size=batch_size, shuffle=shuffle,
+                             workers=self.config.data_workers, max_queue_size=self.config.prefetch_batches)
+
+    def _fit_folds(self, n_windows, datasets, epochs, n_splits):
+        # Спільний цикл K-fold для всіх шляхів навчання; datasets(train_idx, val_idx) -> (train, validation)
+        from sklearn.model_selection import KFold
+
+        model = self._trainable_model()
+        if model is None:
+            model = self.create_model((self.sequence_length, 4))
+
         kf = KFold(n_splits=n_splits, shuffle=True, random_state=42)
         histories = []
-        
-        for train_idx, val_idx in kf.split(X):
-            history = self.model.fit(
-                X[train_idx], y[train_idx],
-                validation_data=(X[val_idx], y[val_idx]),
+
+        for train_idx, val_idx in kf.split(np.arange(n_windows)):
+            train_data, validation_data = datasets(train_idx, val_idx)
+            history = model.fit(
+                train_data,
+                validation_data=validation_data,
                 epochs=epochs,
-                batch_size=batch_size,
+                callbacks=training_callbacks(self.config),
                 verbose=1
             )
             histories.append(history.history)
-        
-        self.model.save(self.model_path)
-        joblib.dump(self.scaler, "models/temperature_scaler.pkl")
-        
+
+        self.save(model)
+
         return histories
+
+    def _trainable_model(self):
+        from ml.numpy_runtime import NumpyLSTM
+
+        model = self.model
+        if not isinstance(model, NumpyLSTM):
+            return model
+
+        # NumpyLSTM вміє лише прямий прохід, тож навчання продовжує Keras-артефакт тієї ж версії
+        path = self.registry.path(self.version) / ModelRegistry.MODEL_FILE if self.version else self.model_path
+        if not path.exists():
+            raise ValueError(f"З MODEL_RUNTIME=numpy донавчання потребує Keras-моделі, файл {path} не знайдено")
+        import keras
+        configure_runtime(self.config)
+        return keras.models.load_model(path)
+
+    def train(self, X, y, epochs=None, batch_size=None, n_splits=5):
+        epochs, batch_size = epochs or self.config.epochs, batch_size or self.config.batch_size
+        return self._fit_folds(len(X), lambda train_idx, val_idx: (
+            self._array_dataset(X[train_idx], y[train_idx], batch_size, shuffle=True),
+            self._array_dataset(X[val_idx], y[val_idx], batch_size, shuffle=False)
+        ), epochs, n_splits)
     
-    def evaluate_model(self, X, y):
-        predictions = self.model.predict(X)
-        
-        denormalized_predictions = []
-        denormalized_actual = []
-        
-        for pred, actual in zip(predictions, y):
-            denormalized_pred = {
-                'min_temp': pred[0] * self.scaler['min']['std'] + self.scaler['min']['mean'],
-                'max_temp': pred[1] * self.scaler['max']['std'] + self.scaler['max']['mean']
-            }
-            denormalized_actual.append({
-                'min_temp': actual[0] * self.scaler['min']['std'] + self.scaler['min']['mean'],
-                'max_temp': actual[1] * self.scaler['max']['std'] + self.scaler['max']['mean']
-            })
-            denormalized_predictions.append(denormalized_pred)
-        
-        min_temp_pred = np.array([p['min_temp'] for p in denormalized_predictions])
-        max_temp_pred = np.array([p['max_temp'] for p in denormalized_predictions])
-        min_temp_actual = np.array([a['min_temp'] for a in denormalized_actual])
-        max_temp_actual = np.array([a['max_temp'] for a in denormalized_actual])
-        
-        metrics = {
-            'min_temp': {
-                'mse': mean_squared_error(min_temp_actual, min_temp_pred),
-                'mae': mean_absolute_error(min_temp_actual, min_temp_pred),
-                'r2': r2_score(min_temp_actual, min_temp_pred)
-            },
-            'max_temp': {
-                'mse': mean_squared_error(max_temp_actual, max_temp_pred),
-                'mae': mean_absolute_error(max_temp_actual, max_temp_pred),
-                'r2': r2_score(max_temp_actual, max_temp_pred)
-            }
-        }
-        
-        return metrics
+    def train_streaming(self, features, epochs=None, batch_size=None, n_splits=5):
+        epochs, batch_size = epochs or self.config.epochs, batch_size or self.config.batch_size
+        return self._fit_folds(len(features) - self.sequence_length, lambda train_idx, val_idx: (
+            self._window_dataset(features, train_idx, batch_size),
+            self._window_dataset(features, val_idx, batch_size, shuffle=False)
+        ), epochs, n_splits)
+
+    def fine_tune(self, df, watermark=None, epochs=None, batch_size=None, replay_ratio=1.0):
+        import keras
+
+        if self.model is None:
+            raise ValueError("Немає збереженої моделі для донавчання")
+        if self.scaler is None:
+            raise ValueError("Scaler моделі не знайдено, потрібне повне навчання")
+
+        # Scaler не перераховується: нові дані нормалізуються так само, як і під час навчання
+        daily_data = self.to_daily(df)
+        features = self.make_features(daily_data)
+        n_windows = len(features) - self.sequence_length
+        if n_windows <= 0:
+            return None
+
+        target_dates = daily_data.index[self.sequence_length:]
+        if watermark is None:
+            new_idx = np.arange(n_windows)
+        else:
+            new_idx = np.flatnonzero(target_dates > pd.Timestamp(watermark))
+        if len(new_idx) == 0:
+            print("Нових даних після останнього навчання немає")
+            return None
+
+        # Частина старих вікон повторюється разом з новими, щоб модель не забувала попередні дані
+        old_idx = np.setdiff1d(np.arange(n_windows), new_idx)
+        rng = np.random.default_rng(42)
+        replay_idx = rng.choice(old_idx, size=min(len(old_idx), int(len(new_idx) * replay_ratio)), replace=False)
+        print(f"Донавчання: {len(new_idx)} нових вікон, {len(replay_idx)} повторених")
+
+        # Навчається копія: поточна модель обслуговує прогнози до гарячої заміни
+        base_model = self._trainable_model()
+        model = keras.models.clone_model(base_model)
+        model.set_weights(base_model.get_weights())
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=self.learning_rate),
+            loss=keras.losses.Huber(),
+            metrics=['mae']
+        )
+        history = model.fit(
+            self._window_dataset(features, np.concatenate([new_idx, replay_idx]),
+                                 batch_size or self.config.batch_size),
+            epochs=epochs or self.config.fine_tune_epochs,
+            verbose=1
+        )
+
+        self.save(model)
+
+        return history.history
+
+    def cross_validate(self, features, epochs=None, batch_size=None, n_splits=5, workers=None,
+                       tf_threads=None, ensemble=False):
+        from ml.cross_validation import run_cross_validation
+
+        results, ensemble_model = run_cross_validation(
+            features, self.scaler, self.sequence_length, self.learning_rate,
+            epochs=epochs or self.config.epochs,
+            batch_size=batch_size or self.config.batch_size,
+            n_splits=n_splits,
+            workers=workers if workers is not None else self.config.cv_workers,
+            tf_threads=tf_threads if tf_threads is not None else self.config.cv_tf_threads,
+            ensemble=ensemble,
+            config=self.config
+        )
+
+        if ensemble_model is not None:
+            self.model = ensemble_model
+            self.save()
+
+        return results
+
+    def tune(self, features, db_manager=None, env_path=None, n_trials=9, min_epochs=2, max_epochs=18, eta=3,
+             workers=None, tf_threads=None):
+        from ml.tuning import record_results, successive_halving, write_best_config
+
+        best, results = successive_halving(
+            features, self.scaler, self.config,
+            n_trials=n_trials,
+            min_epochs=min_epochs,
+            max_epochs=max_epochs,
+            eta=eta,
+            workers=workers if workers is not None else self.config.cv_workers,
+            tf_threads=tf_threads if tf_threads is not None else self.config.cv_tf_threads
+        )
+
+        if db_manager is not None:
+            record_results(db_manager, results, best)
+        if env_path is not None:
+            # Нова конфігурація застосовується під час наступного повного навчання
+            write_best_config(best['params'], env_path)
+
+        return best, results
+
+    def evaluate_model(self, X, y, batch_size=1024):
+        from ml.metrics import StreamingMetrics, scaler_arrays
+
+        mean, std = scaler_arrays(self.scaler)
+        metrics = StreamingMetrics()
+        # X може бути поданням sliding_window_view: копіюється лише поточний батч вікон
+        for start in range(0, len(X), batch_size):
+            predictions = self.forecast_engine.step(np.asarray(X[start:start + batch_size], dtype=np.float32))
+            metrics.update(y[start:start + batch_size] * std + mean, predictions * std + mean)
+
+        return metrics.result()
     
     def predict(self, X):
         if not self.health_check():
             raise ValueError("Модель не готова до прогнозування")
-        predictions = self.model.predict(X, verbose=0)
+        predictions = self.forecast_engine.step(np.asarray(X, dtype=np.float32))
 
         return np.sort(predictions, axis=1)
 
-    def predict_year(self, last_sequence):
-        predictions = []
-        current_sequence = last_sequence.copy()
-        
-        start_date = datetime.now().replace(month=1, day=1)
-        for i in range(365):  # Прогноз на рік
-            current_date = start_date + pd.Timedelta(days=i)
-            month = current_date.month
-            
-            month_sin = np.sin(2 * np.pi * month / 12)
-            month_cos = np.cos(2 * np.pi * month / 12)
-            
-            current_sequence[0, :, -2:] = np.array([month_sin, month_cos])
-            
-            pred = self.model.predict(current_sequence.reshape(1, self.sequence_length, 4), verbose=0)
-            pred = np.sort(pred, axis=1)
+    def predict_year(self, last_sequence, year=None, start_date=None):
+        # Без start_date вікно вважається таким, що закінчується напередодні 1 січня поточного року
+        start_date = datetime.now().replace(month=1, day=1) if start_date is None else start_date
+        year = pd.Timestamp(start_date).year if year is None else year
+        return self.predict_years(last_sequence, start_date, year)[year][0]
 
-            denormalized_pred = {
-                'min_temp': pred[0][0] * self.scaler['min']['std'] + self.scaler['min']['mean'],
-                'max_temp': pred[0][1] * self.scaler['max']['std'] + self.scaler['max']['mean']
-            }
-            
-            current_sequence = np.roll(current_sequence, -1, axis=1) 
-            current_sequence[0, -1, :2] = pred[0]  
-            
-            predictions.append(pred[0])
-        
-        denormalized_predictions = []
-        for pred in predictions:
-            denormalized_pred = {
-                'min_temp': pred[0] * self.scaler['min']['std'] + self.scaler['min']['mean'],
-                'max_temp': pred[1] * self.scaler['max']['std'] + self.scaler['max']['mean']
+    def predict_stations(self, windows, year=None, start_date=None):
+        start_date = datetime.now().replace(month=1, day=1) if start_date is None else start_date
+        year = pd.Timestamp(start_date).year if year is None else year
+        station_ids = list(windows)
+        last_sequences = np.concatenate([windows[station_id][0][-1:] for station_id in station_ids])
+        return dict(zip(station_ids, self.predict_years(last_sequences, start_date, year)[year]))
+
+    @property
+    def forecast_engine(self):
+        if (self._forecast_engine is None or self._forecast_engine.model is not self.model
+                or self._forecast_engine.scaler is not self.scaler):
+            from ml.inference import ForecastEngine
+            self._forecast_engine = ForecastEngine(self.model, self.scaler, self.sequence_length)
+        return self._forecast_engine
+
+    @property
+    def interval_quantiles(self):
+        tail = (1 - self.config.prediction_interval) / 2
+        return tail, 0.5, 1 - tail
+
+    def predict_years(self, last_sequences, start_date, last_year, samples=None):
+        samples = self.config.mc_samples if samples is None else samples
+        forecasts = self.forecast_engine.forecast_years(last_sequences, start_date, last_year, samples,
+                                                        self.interval_quantiles)
+        if samples <= 0:
+            return {
+                year: [self._to_records(sequence_predictions) for sequence_predictions in predictions]
+                for year, predictions in forecasts.items()
             }
-            denormalized_predictions.append(denormalized_pred)
-            
-        return denormalized_predictions 
\ No newline at end of file
+
+        # З інтервалами точковий прогноз - медіана тих самих MC-траєкторій, тож він завжди лежить у межах
+        return {
+            year: [
+                self._to_records(sequence_predictions, bounds, self.config.prediction_interval)
+                for sequence_predictions, bounds in zip(predictions, zip(lower, upper))
+            ]
+            for year, (lower, predictions, upper) in forecasts.items()
+        }
+
+    @staticmethod
+    def _to_records(predictions, bounds=None, confidence=None):
+        records = [{'min_temp': min_temp, 'max_temp': max_temp} for min_temp, max_temp in predictions]
+        if bounds is not None:
+            lower, upper = bounds
+            for record, (min_low, max_low), (min_high, max_high) in zip(records, lower, upper):
+                record.update({
+                    'min_temp_low': min_low, 'min_temp_high': min_high,
+                    'max_temp_low': max_low, 'max_temp_high': max_high,
+                    'confidence': confidence
+                })
+        return records
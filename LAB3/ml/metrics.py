@@ -0,0 +1,59 @@
+import numpy as np
+
+TARGETS = ('min_temp', 'max_temp')
+
+
+class StreamingMetrics:
+    # MSE/MAE/R² накопичуються по батчах: пам'ять не залежить від довжини вибірки
+
+    def __init__(self, n_targets=len(TARGETS)):
+        self.count = 0
+        self.sum_squared_error = np.zeros(n_targets)
+        self.sum_absolute_error = np.zeros(n_targets)
+        # Середнє та сума квадратів відхилень фактичних значень (алгоритм Чана) для знаменника R²
+        self.mean = np.zeros(n_targets)
+        self.m2 = np.zeros(n_targets)
+
+    def update(self, actual, predicted):
+        actual = np.asarray(actual, dtype=np.float64)
+        error = np.asarray(predicted, dtype=np.float64) - actual
+        n = len(actual)
+        if n == 0:
+            return self
+
+        self.sum_squared_error += np.einsum('ij,ij->j', error, error)
+        self.sum_absolute_error += np.abs(error).sum(axis=0)
+
+        batch_mean = actual.mean(axis=0)
+        centered = actual - batch_mean
+        batch_m2 = np.einsum('ij,ij->j', centered, centered)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        return self
+
+    def result(self):
+        mse = self.sum_squared_error / self.count
+        mae = self.sum_absolute_error / self.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r2 = np.where(self.m2 > 0, 1 - self.sum_squared_error / self.m2, 0.0)
+        return {
+            name: {'mse': float(mse[column]), 'mae': float(mae[column]), 'r2': float(r2[column])}
+            for column, name in enumerate(TARGETS)
+        }
+
+
+def scaler_arrays(scaler):
+    mean = np.array([scaler['min']['mean'], scaler['max']['mean']])
+    std = np.array([scaler['min']['std'], scaler['max']['std']])
+    return mean, std
+
+
+def regression_metrics(actual, predicted, scaler=None):
+    actual, predicted = np.asarray(actual), np.asarray(predicted)
+    if scaler is not None:
+        mean, std = scaler_arrays(scaler)
+        actual, predicted = actual * std + mean, predicted * std + mean
+    return StreamingMetrics().update(actual, predicted).result()
@@ -0,0 +1,280 @@
+import io
+import time
+import numpy as np
+
+from ml.metrics import regression_metrics
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Інференс без TensorFlow: ваги Keras-моделі зберігаються у .npz, а прямий прохід
+# BiLSTM -> BatchNorm -> Dense виконується засобами NumPy
+
+
+def model_members(model):
+    import keras
+
+    if isinstance(model, keras.Sequential):
+        return [model]
+    # Ансамбль із крос-валідації: функціональна модель, що усереднює кілька Sequential
+    members = [layer for layer in model.layers if isinstance(layer, keras.Sequential)]
+    if not members:
+        raise ValueError(f"Модель {model.name} не підтримується для експорту")
+    return members
+
+
+def export_arrays(model, scaler, sequence_length, precision="float32"):
+    import keras
+
+    arrays = {'sequence_length': np.array(sequence_length)}
+    if scaler is not None:
+        arrays['scaler'] = np.array([scaler['min']['mean'], scaler['min']['std'],
+                                     scaler['max']['mean'], scaler['max']['std']], dtype=np.float64)
+
+    members = model_members(model)
+    arrays['members'] = np.array(len(members))
+    for m, member in enumerate(members):
+        kinds = []
+        for layer in member.layers:
+            prefix = f"m{m}_l{len(kinds)}_"
+            if isinstance(layer, keras.layers.Bidirectional):
+                for direction, lstm in (('fwd', layer.forward_layer), ('bwd', layer.backward_layer)):
+                    kernel, recurrent_kernel, bias = lstm.get_weights()
+                    arrays[prefix + direction + '_kernel'] = kernel
+                    arrays[prefix + direction + '_recurrent'] = recurrent_kernel
+                    arrays[prefix + direction + '_bias'] = bias
+                kinds.append('bilstm_seq' if layer.forward_layer.return_sequences else 'bilstm')
+            elif isinstance(layer, keras.layers.BatchNormalization):
+                gamma, beta, moving_mean, moving_variance = layer.get_weights()
+                # Нормалізація в режимі інференсу зводиться до множення та зсуву
+                scale = gamma / np.sqrt(moving_variance + layer.epsilon)
+                arrays[prefix + 'scale'] = scale
+                arrays[prefix + 'shift'] = beta - moving_mean * scale
+                kinds.append('batchnorm')
+            elif isinstance(layer, keras.layers.Dense):
+                kernel, bias = layer.get_weights()
+                arrays[prefix + 'kernel'] = kernel
+                arrays[prefix + 'bias'] = bias
+                kinds.append('dense_relu' if layer.activation.__name__ == 'relu' else 'dense')
+            elif isinstance(layer, keras.layers.Dropout):
+                # Потрібен лише для MC dropout; у звичайному прямому проході шар пропускається
+                arrays[prefix + 'rate'] = np.array(layer.rate)
+                kinds.append('dropout')
+            else:
+                raise ValueError(f"Шар {layer.__class__.__name__} не підтримується для експорту")
+        arrays[f"m{m}_layers"] = np.array(kinds)
+    return compress_arrays(arrays, precision)
+
+
+def compress_arrays(arrays, precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Невідома точність інференсу: {precision}")
+
+    # Стискаються лише матриці ядер; зсуви та BatchNorm лишаються в повній точності.
+    # Масштаби int8 зберігаються поруч із матрицею під ключем <ключ>_qscale
+    compressed = {'precision': np.array(precision)}
+    for key, values in arrays.items():
+        if precision != "float32" and values.ndim == 2 and np.issubdtype(values.dtype, np.floating):
+            matrix = CompressedMatrix.compress(values, precision)
+            compressed[key] = matrix.values
+            if matrix.scale is not None:
+                compressed[key + '_qscale'] = matrix.scale
+        else:
+            compressed[key] = values
+    return compressed
+
+
+def export_npz(model, scaler, sequence_length, path, precision="float32"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **export_arrays(model, scaler, sequence_length, precision))
+    return path
+
+
+class CompressedMatrix:
+    # Матриця ваг у зниженій точності. Так вона зберігається у файлі й у пам'яті, а у float32
+    # розпаковується на час одного прямого проходу: множення у float16/int8 на CPU повільніше за float32
+
+    def __init__(self, values, scale=None):
+        self.values = values
+        self.scale = scale
+
+    @classmethod
+    def compress(cls, matrix, precision):
+        if precision == "float16":
+            return cls(matrix.astype(np.float16))
+        # Симетричне int8-квантування з окремим масштабом для кожного вихідного стовпця
+        scale = np.abs(matrix).max(axis=0) / 127
+        scale[scale == 0] = 1
+        return cls(np.round(matrix / scale).astype(np.int8), scale.astype(np.float32))
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def dequantize(self, dtype=np.float32):
+        values = self.values.astype(dtype)
+        return values if self.scale is None else values * self.scale.astype(dtype)
+
+
+def _unpack(values, dtype):
+    return values.dequantize(dtype) if isinstance(values, CompressedMatrix) else values
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1)
+
+
+def _lstm(x, kernel, recurrent_kernel, bias, reverse, return_sequences):
+    n, length, _ = x.shape
+    units = recurrent_kernel.shape[0]
+    # Вхідна проєкція рахується одразу для всіх кроків, у циклі лишається лише рекурентна частина
+    projected = x @ kernel + bias
+    h = np.zeros((n, units), dtype=x.dtype)
+    c = np.zeros((n, units), dtype=x.dtype)
+    outputs = np.empty((n, length, units), dtype=x.dtype) if return_sequences else None
+
+    for step in (range(length - 1, -1, -1) if reverse else range(length)):
+        z = projected[:, step] + h @ recurrent_kernel
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if return_sequences:
+            outputs[:, step] = h
+
+    return outputs if return_sequences else h
+
+
+class NumpyLSTM:
+
+    def __init__(self, members, sequence_length, scaler=None, dtype=np.float32, precision="float32"):
+        self.members = members
+        self.sequence_length = sequence_length
+        self.scaler = scaler
+        self.dtype = dtype
+        self.precision = precision
+
+    @classmethod
+    def from_arrays(cls, data, dtype=np.float32, precision=None):
+        keys = list(data.keys())
+        stored = str(data['precision']) if 'precision' in keys else "float32"
+        precision = precision or stored
+        if precision != stored:
+            if stored != "float32":
+                raise ValueError(f"Ваги збережено в точності {stored}, а не {precision}: експортуйте модель повторно")
+            # Старий файл у float32: ваги стискаються в пам'яті, тож економія пам'яті є, а файлу — ні
+            data = compress_arrays({key: np.asarray(data[key]) for key in keys}, precision)
+            keys = list(data.keys())
+
+        members = []
+        for m in range(int(data['members'])):
+            layers = []
+            for index, kind in enumerate(data[f"m{m}_layers"]):
+                prefix = f"m{m}_l{index}_"
+                weights = {}
+                for key in keys:
+                    if not key.startswith(prefix) or key.endswith('_qscale'):
+                        continue
+                    values = np.asarray(data[key])
+                    if values.ndim == 2 and values.dtype in (np.float16, np.int8):
+                        # Стиснута матриця завантажується як є, разом з масштабами int8
+                        scale = np.asarray(data[key + '_qscale']) if key + '_qscale' in keys else None
+                        values = CompressedMatrix(values, scale)
+                    else:
+                        values = values.astype(dtype)
+                    weights[key[len(prefix):]] = values
+                layers.append((str(kind), weights))
+            members.append(layers)
+
+        scaler = None
+        if 'scaler' in keys:
+            min_mean, min_std, max_mean, max_std = np.asarray(data['scaler']).tolist()
+            scaler = {'min': {'mean': min_mean, 'std': min_std}, 'max': {'mean': max_mean, 'std': max_std}}
+
+        return cls(members, int(data['sequence_length']), scaler, dtype, precision)
+
+    @classmethod
+    def load(cls, path, dtype=np.float32, precision=None):
+        with np.load(path) as data:
+            return cls.from_arrays(data, dtype, precision)
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for layers in self.members for _, weights in layers for values in weights.values())
+
+    def _forward(self, layers, x, rng=None):
+        for kind, weights in layers:
+            # Стиснуті ядра розпаковуються раз на шар, а не на кожен крок рекурентного циклу
+            weights = {name: _unpack(values, x.dtype) for name, values in weights.items()}
+            if kind.startswith('bilstm'):
+                return_sequences = kind == 'bilstm_seq'
+                forward = _lstm(x, weights['fwd_kernel'], weights['fwd_recurrent'], weights['fwd_bias'],
+                                False, return_sequences)
+                backward = _lstm(x, weights['bwd_kernel'], weights['bwd_recurrent'], weights['bwd_bias'],
+                                 True, return_sequences)
+                x = np.concatenate([forward, backward], axis=-1)
+            elif kind == 'batchnorm':
+                x = x * weights['scale'] + weights['shift']
+            elif kind == 'dropout':
+                if rng is not None:
+                    keep = 1 - weights['rate']
+                    x = x * (rng.random(x.shape, dtype=x.dtype) < keep) / keep
+            else:
+                x = x @ weights['kernel'] + weights['bias']
+                if kind == 'dense_relu':
+                    x = np.maximum(x, 0)
+        return x
+
+    def __call__(self, x, rng=None):
+        # З генератором rng шари Dropout активні, як у Keras з training=True
+        x = np.asarray(x, dtype=self.dtype)
+        outputs = [self._forward(layers, x, rng) for layers in self.members]
+        return outputs[0] if len(outputs) == 1 else np.mean(outputs, axis=0)
+
+    def predict(self, x, verbose=0):
+        return self(x)
+
+
+def precision_report(arrays, X, y, precisions=PRECISIONS, repeats=20, batch_size=1):
+    scaler = NumpyLSTM.from_arrays(arrays).scaler
+    X = np.asarray(X, dtype=np.float32)
+
+    report = {}
+    baseline = None
+    for precision in precisions:
+        compressed = compress_arrays(arrays, precision)
+        # Розмір файлу вимірюється за фактичним .npz, а пам'ять — за тим, що модель тримає після завантаження
+        buffer = io.BytesIO()
+        np.savez(buffer, **compressed)
+        model = NumpyLSTM.from_arrays(compressed)
+        metrics = regression_metrics(y, model(X), scaler)
+
+        batch = X[:batch_size]
+        model(batch)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            model(batch)
+        latency = (time.perf_counter() - started) / repeats
+
+        report[precision] = {
+            'latency_ms': latency * 1000,
+            'weights_mb': model.nbytes / 2 ** 20,
+            'file_mb': buffer.getbuffer().nbytes / 2 ** 20,
+            'metrics': metrics
+        }
+        if baseline is None:
+            baseline = metrics
+        # Дрейф відносно повної точності: зростання MAE та падіння R² у градусах/частках
+        report[precision]['drift'] = {
+            name: {
+                'mae': metrics[name]['mae'] - baseline[name]['mae'],
+                'r2': metrics[name]['r2'] - baseline[name]['r2']
+            }
+            for name in metrics
+        }
+    return report
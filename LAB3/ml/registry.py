@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import threading
+
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+
+class ModelRegistry:
+    MODEL_FILE = "model.keras"
+    SCALER_FILE = "scaler.pkl"
+    NUMPY_FILE = "model.npz"
+    META_FILE = "meta.json"
+    ACTIVE_FILE = "active.json"
+
+    def __init__(self, root, capacity=3, keep=10, runtime="keras", precision="float32"):
+        self.root = Path(root)
+        self.capacity = capacity
+        self.keep = keep
+        self.runtime = runtime
+        self.precision = precision
+        self._resident = OrderedDict()
+        self._lock = threading.Lock()
+
+    def versions(self):
+        if not self.root.exists():
+            return []
+        # Версія вважається опублікованою лише після появи meta.json
+        return sorted(path.name for path in self.root.iterdir() if (path / self.META_FILE).exists())
+
+    def path(self, version):
+        return self.root / version
+
+    def _read_active(self):
+        try:
+            with open(self.root / self.ACTIVE_FILE, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {'active': None, 'history': []}
+
+    def _write_active(self, state):
+        self.root.mkdir(parents=True, exist_ok=True)
+        temp_path = self.root / f".{self.ACTIVE_FILE}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file)
+        os.replace(temp_path, self.root / self.ACTIVE_FILE)
+
+    @property
+    def active_version(self):
+        version = self._read_active()['active']
+        return version if version is not None and (self.path(version) / self.META_FILE).exists() else None
+
+    @property
+    def previous_version(self):
+        history = self._read_active()['history']
+        return history[-1] if history else None
+
+    def register(self, model, scaler, sequence_length, metrics=None, hyperparameters=None):
+        import joblib
+        from ml.numpy_runtime import export_npz
+
+        with self._lock:
+            versions = self.versions()
+            version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+            temp_path = self.root / f".{version}.tmp"
+            shutil.rmtree(temp_path, ignore_errors=True)
+            temp_path.mkdir(parents=True)
+
+            model.save(temp_path / self.MODEL_FILE)
+            joblib.dump(scaler, temp_path / self.SCALER_FILE)
+            export_npz(model, scaler, sequence_length, temp_path / self.NUMPY_FILE, self.precision)
+            with open(temp_path / self.META_FILE, 'w', encoding='utf-8') as file:
+                json.dump({
+                    'version': version,
+                    'created_at': datetime.now().isoformat(timespec='seconds'),
+                    'sequence_length': sequence_length,
+                    'metrics': metrics,
+                    'hyperparameters': hyperparameters
+                }, file, default=float)
+
+            # Каталог версії з'являється цілком або не з'являється зовсім
+            os.replace(temp_path, self.path(version))
+            # Об'єкт, що навчався на місці, більше не відповідає жодній зі збережених раніше версій
+            for resident_version, entry in list(self._resident.items()):
+                if entry[0] is model:
+                    del self._resident[resident_version]
+            self._prune()
+
+        print(f"Модель збережено в реєстрі як {version}")
+        return version
+
+    def load(self, version):
+        with self._lock:
+            if version in self._resident:
+                self._resident.move_to_end(version)
+                return self._resident[version]
+
+        path = self.path(version)
+        with open(path / self.META_FILE, 'r', encoding='utf-8') as file:
+            sequence_length = json.load(file)['sequence_length']
+
+        if self.runtime == "numpy":
+            from ml.numpy_runtime import NumpyLSTM
+
+            model = NumpyLSTM.load(path / self.NUMPY_FILE, precision=self.precision)
+            scaler = model.scaler
+        else:
+            import joblib
+            import keras
+
+            model = keras.models.load_model(path / self.MODEL_FILE)
+            scaler = joblib.load(path / self.SCALER_FILE)
+
+        entry = (model, scaler, sequence_length)
+        self._remember(version, entry)
+        return entry
+
+    def activate(self, version, rollback=False):
+        with self._lock:
+            state = self._read_active()
+            history = [item for item in state['history'] if (self.path(item) / self.META_FILE).exists()]
+            if rollback:
+                if history and history[-1] == version:
+                    history.pop()
+            elif state['active'] is not None and state['active'] != version:
+                history.append(state['active'])
+            self._write_active({'active': version, 'history': history[-self.keep:]})
+
+    def _remember(self, version, entry):
+        # load викликає цей метод поза _lock, поки register/_prune можуть змінювати _resident з потоку навчання
+        with self._lock:
+            self._resident[version] = entry
+            self._resident.move_to_end(version)
+            while len(self._resident) > self.capacity:
+                self._resident.popitem(last=False)
+
+    def _prune(self):
+        state = self._read_active()
+        protected = {state['active'], *state['history']}
+        versions = self.versions()
+        for version in versions[:max(0, len(versions) - self.keep)]:
+            if version not in protected:
+                shutil.rmtree(self.path(version), ignore_errors=True)
+                self._resident.pop(version, None)
@@ -0,0 +1,165 @@
+import numpy as np
+
+from pathlib import Path
+from dotenv import set_key
+
+from ml.cross_validation import worker_pool
+from ml.metrics import regression_metrics
+
+SEARCH_SPACE = {
+    'sequence_length': [14, 30, 60],
+    'batch_size': [32, 64, 128],
+    'learning_rate': (1e-4, 1e-2),
+    'lstm_units': [(32, 16), (64, 32), (128, 64), (256, 128)],
+    'dense_units': [16, 32, 64],
+}
+
+
+def sample_params(rng, space=SEARCH_SPACE):
+    params = {}
+    for name, values in space.items():
+        if name == 'learning_rate':
+            # Швидкість навчання обирається рівномірно в логарифмічній шкалі
+            low, high = values
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            value = values[rng.integers(len(values))]
+            params[name] = tuple(int(v) for v in value) if isinstance(value, tuple) else int(value)
+    return params
+
+
+def split_indices(n_days, sequence_length, validation_split):
+    # Валідаційні дні однакові для будь-якої довжини вікна, тож оцінки спроб порівнювані
+    split_day = int(n_days * (1 - validation_split))
+    return np.arange(split_day - sequence_length), np.arange(split_day - sequence_length, n_days - sequence_length)
+
+
+def _run_trial(task):
+    import keras
+    from ml.datasets import WindowDataset
+    from ml.lstm_model import build_model
+
+    params, config, features = task['params'], task['config'], task['features']
+    sequence_length, batch_size = params['sequence_length'], params['batch_size']
+    # Спроби навчаються з тією ж політикою точності, що й складки крос-валідації та фінальна модель
+    keras.mixed_precision.set_global_policy(config.mixed_precision)
+    keras.utils.set_random_seed(task['seed'] + task['trial'])
+
+    model = build_model((sequence_length, 4), params['learning_rate'], config.jit_compile,
+                        params['lstm_units'], params['dense_units'])
+    if task['weights'] is not None:
+        # Спроба, що пройшла відсів, продовжує навчання з попередніх ваг і стану Adam,
+        # тож раунд не починається з обнулених моментів оптимізатора
+        model.build((None, sequence_length, 4))
+        model.set_weights(task['weights'])
+        model.optimizer.build(model.trainable_variables)
+        for variable, value in zip(model.optimizer.variables, task['optimizer']):
+            variable.assign(value)
+
+    train_idx, val_idx = split_indices(len(features), sequence_length, config.validation_split)
+    model.fit(
+        WindowDataset(features, sequence_length, train_idx, batch_size=batch_size, workers=1),
+        initial_epoch=task['initial_epoch'],
+        epochs=task['epochs'],
+        verbose=0
+    )
+    predicted = model.predict(
+        WindowDataset(features, sequence_length, val_idx, batch_size=batch_size, shuffle=False, workers=1),
+        verbose=0
+    )
+    metrics = regression_metrics(features[val_idx + sequence_length, :2], predicted, task['scaler'])
+
+    return {
+        'trial': task['trial'],
+        'rung': task['rung'],
+        'params': params,
+        'epochs': task['epochs'],
+        'score': (metrics['min_temp']['mae'] + metrics['max_temp']['mae']) / 2,
+        'metrics': metrics,
+        'parameters': int(model.count_params()),
+        'weights': model.get_weights(),
+        'optimizer': [np.asarray(variable) for variable in model.optimizer.variables]
+    }
+
+
+def successive_halving(features, scaler, config, n_trials=9, min_epochs=2, max_epochs=18, eta=3,
+                       workers=None, tf_threads=1, seed=42, space=SEARCH_SPACE):
+    rng = np.random.default_rng(seed)
+    survivors = [
+        {'trial': trial, 'params': sample_params(rng, space), 'weights': None, 'optimizer': None, 'epochs': 0}
+        for trial in range(n_trials)
+    ]
+
+    workers, executor = worker_pool(n_trials, workers, tf_threads)
+    print(f"Пошук гіперпараметрів: {n_trials} спроб, {workers} процесів по {tf_threads} потоків TensorFlow")
+
+    results = []
+    rung, epochs = 0, min(min_epochs, max_epochs)
+    with executor:
+        while True:
+            tasks = [
+                {
+                    'trial': survivor['trial'],
+                    'rung': rung,
+                    'params': survivor['params'],
+                    'weights': survivor['weights'],
+                    'optimizer': survivor['optimizer'],
+                    'initial_epoch': survivor['epochs'],
+                    'epochs': epochs,
+                    'features': features,
+                    'scaler': scaler,
+                    'config': config,
+                    'seed': seed
+                }
+                for survivor in survivors
+            ]
+            rung_results = sorted(executor.map(_run_trial, tasks), key=lambda result: result['score'])
+            for result in rung_results:
+                print(f"Раунд {rung}, спроба {result['trial']}: MAE {result['score']:.3f} після "
+                      f"{result['epochs']} епох, {result['parameters']} параметрів, {result['params']}")
+            results.extend({key: value for key, value in result.items() if key not in ('weights', 'optimizer')}
+                           for result in rung_results)
+
+            if len(rung_results) <= 1 or epochs >= max_epochs:
+                break
+
+            # Відсів: до наступного раунду з більшим бюджетом епох проходить лише краща 1/eta спроб
+            survivors = rung_results[:max(1, len(rung_results) // eta)]
+            rung, epochs = rung + 1, min(epochs * eta, max_epochs)
+
+    best = {key: value for key, value in rung_results[0].items() if key not in ('weights', 'optimizer')}
+    return best, results
+
+
+def random_search(features, scaler, config, n_trials=9, epochs=10, **kwargs):
+    # Випадковий пошук - окремий випадок послідовного відсіву з одним раундом
+    return successive_halving(features, scaler, config, n_trials=n_trials, min_epochs=epochs,
+                              max_epochs=epochs, **kwargs)
+
+
+def record_results(db_manager, results, best):
+    for result in results:
+        metrics = {
+            'score': result['score'],
+            'metrics': result['metrics'],
+            'epochs': result['epochs'],
+            'rung': result['rung'],
+            'parameters': result['parameters'],
+            'best': result['trial'] == best['trial'] and result['rung'] == best['rung']
+        }
+        db_manager.save_model_metadata('LSTM-search', metrics, hyperparameters=result['params'])
+
+
+def write_best_config(params, env_path=Path(".env")):
+    values = {
+        'SEQUENCE_LENGTH': str(params['sequence_length']),
+        'BATCH_SIZE': str(params['batch_size']),
+        'LEARNING_RATE': f"{params['learning_rate']:.6g}",
+        'LSTM_UNITS': ",".join(str(units) for units in params['lstm_units']),
+        'DENSE_UNITS': str(params['dense_units']),
+    }
+    env_path.touch(exist_ok=True)
+    for key, value in values.items():
+        set_key(str(env_path), key, value, quote_mode="never")
+    print(f"Найкращу конфігурацію записано у {env_path}")
+    return values
@@ -0,0 +1,374 @@
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import urllib.request
+import numpy as np
+import pandas as pd
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from core.config import DatabaseConfig, ModelConfig, ServiceConfig
+from database.db_manager import DatabaseManager
+from ml.forecast_cache import ForecastCache
+from ml.inference import ForecastEngine
+from ml.lstm_model import TemperatureLSTM
+
+
+class ServiceMetrics:
+
+    def __init__(self, window=10_000, rate_window=10.0):
+        self.started = time.perf_counter()
+        self.rate_window = rate_window
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.max_batch = 0
+        self._latencies = deque(maxlen=window)
+        self._finished = deque()
+        self._lock = threading.Lock()
+
+    def record_request(self, latency, error=False, cache_hit=False):
+        with self._lock:
+            self.requests += 1
+            self.errors += error
+            self.cache_hits += cache_hit
+            self._latencies.append(latency)
+            self._finished.append(time.perf_counter())
+            self._expire(self._finished[-1])
+
+    def _expire(self, now):
+        while self._finished and now - self._finished[0] > self.rate_window:
+            self._finished.popleft()
+
+    def record_batch(self, size):
+        with self._lock:
+            self.batches += 1
+            self.batched_items += size
+            self.max_batch = max(self.max_batch, size)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            now = time.perf_counter()
+            uptime = now - self.started
+            # Пропускна здатність за останні rate_window секунд, а не середнє за весь час роботи з простоями
+            self._expire(now)
+            window = min(self.rate_window, uptime)
+            return {
+                'uptime_s': round(uptime, 3),
+                'requests': self.requests,
+                'errors': self.errors,
+                'cache_hits': self.cache_hits,
+                'throughput_rps': round(len(self._finished) / window, 2) if window else 0.0,
+                'throughput_window_s': self.rate_window,
+                'batches': self.batches,
+                'avg_batch_size': round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+                'max_batch_size': self.max_batch,
+                'latency_ms': {
+                    name: round(float(np.percentile(latencies, q)), 3) if len(latencies) else 0.0
+                    for name, q in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))
+                }
+            }
+
+
+class MicroBatcher:
+    # Запити з різних потоків збираються в один батч: не більше max_batch_size і не довше max_wait
+
+    def __init__(self, handler, max_batch_size=64, max_wait=0.01, metrics=None, name="batcher", timeout=None):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout if timeout is not None else self.timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = list(self.handler(items))
+                if len(results) != len(batch):
+                    # Інакше частина запитів чекала б на результат, якого ніколи не буде
+                    raise RuntimeError(f"Обробник повернув {len(results)} результатів на {len(batch)} запитів")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                if self.metrics is not None:
+                    self.metrics.record_batch(len(batch))
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class ForecastService:
+
+    def __init__(self, model, db_manager, config: ServiceConfig):
+        self.model = model
+        self.db_manager = db_manager
+        self.config = config
+        self.forecast_cache = ForecastCache(db_manager)
+        self.metrics = ServiceMetrics()
+        self._sequences = {}
+        self._sequences_lock = threading.Lock()
+        # Прогнози записуються в БД окремим потоком, щоб запис не затримував наступні батчі
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forecast-writer")
+
+        max_wait = config.max_wait_ms / 1000
+        self.step_batcher = MicroBatcher(self._predict_steps, config.max_batch_size, max_wait,
+                                         self.metrics, name="step-batcher", timeout=config.request_timeout)
+        self.forecast_batcher = MicroBatcher(self._predict_years, config.max_batch_size, max_wait,
+                                             self.metrics, name="forecast-batcher", timeout=config.request_timeout)
+
+    def _predict_steps(self, sequences):
+        return self.model.predict(np.stack(sequences)).tolist()
+
+    def _predict_years(self, requests):
+        # Запити з однаковою датою початку мають спільний прогін до найпізнішого року групи:
+        # ближчі роки є його префіксом, тож окремі прогони на кожен рік лише повторювали б ті самі кроки
+        groups = {}
+        for index, request in enumerate(requests):
+            groups.setdefault(request['start_date'], []).append(index)
+
+        predictions = [None] * len(requests)
+        for start_date, indices in groups.items():
+            last_year = max(requests[index]['year'] for index in indices)
+            forecasts = self.model.predict_years(np.stack([requests[index]['sequence'] for index in indices]),
+                                                 start_date, last_year)
+            for position, index in enumerate(indices):
+                request = requests[index]
+                predictions[index] = forecasts[request['year']][position]
+                # Пам'ять оновлюється одразу: повторний запит не має чекати, поки потік запису дійде до цього року
+                self.forecast_cache.remember(request['key'], request['station_id'], predictions[index])
+                self._writer.submit(self.forecast_cache.put, request['key'], request['year'], predictions[index],
+                                    request['station_id'], ForecastEngine.year_start(start_date, request['year']),
+                                    self.model.version)
+        return predictions
+
+    def last_window(self, station_id):
+        # Останнє вікно станції оновлюється не частіше ніж раз на data_ttl секунд
+        cache_key = (station_id, self.model.sequence_length)
+        with self._sequences_lock:
+            cached = self._sequences.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < self.config.data_ttl:
+                return cached[1:]
+
+        sequence, start_date = self.model.last_window(self.db_manager.get_daily_data(station_id=station_id))
+        with self._sequences_lock:
+            self._sequences[cache_key] = (time.monotonic(), sequence[0], start_date)
+        return sequence[0], start_date
+
+    def forecast(self, year, station_id):
+        sequence, start_date = self.last_window(station_id)
+        # Рік перевіряється до батчу, інакше некоректний запит зірвав би прогін усієї групи
+        ForecastEngine.horizon(start_date, year)
+        if year >= start_date.year + self.config.max_forecast_years:
+            raise ValueError(f"Прогноз доступний не далі ніж на {self.config.max_forecast_years} років "
+                             f"від {start_date:%Y-%m-%d}")
+
+        key = self.forecast_cache.make_key(self.model, sequence[None], year, start_date)
+        predictions = self.forecast_cache.get(key, year, station_id, self.model.version)
+        cached = predictions is not None
+        if not cached:
+            predictions = self.forecast_batcher({'sequence': sequence, 'start_date': start_date, 'key': key,
+                                                 'year': year, 'station_id': station_id})
+
+        first_day = ForecastEngine.year_start(start_date, year)
+        return {
+            'station_id': station_id,
+            'year': year,
+            'version': self.model.version,
+            'cached': cached,
+            'predictions': [
+                {
+                    'date': (first_day + pd.Timedelta(days=i)).strftime("%Y-%m-%d"),
+                    **{key: float(value) for key, value in prediction.items() if value is not None}
+                }
+                for i, prediction in enumerate(predictions)
+            ]
+        }
+
+    def predict(self, sequence):
+        try:
+            sequence = np.asarray(sequence, dtype=np.float32)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Некоректна послідовність: {e}")
+        if sequence.shape != (self.model.sequence_length, 4):
+            raise ValueError(f"Очікується послідовність форми ({self.model.sequence_length}, 4), "
+                             f"отримано {sequence.shape}")
+        min_temp, max_temp = self.step_batcher(sequence)
+        return {'min_temp': min_temp, 'max_temp': max_temp}
+
+    def health(self):
+        return {'state': self.model.state, 'version': self.model.version,
+                'sequence_length': self.model.sequence_length}
+
+
+class ForecastRequestHandler(BaseHTTPRequestHandler):
+    service: ForecastService = None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, action, cache_hit=lambda result: False):
+        started = time.perf_counter()
+        try:
+            result = action()
+        except ValueError as e:
+            self.service.metrics.record_request(time.perf_counter() - started, error=True)
+            return self._send(400, {'error': str(e)})
+        except TimeoutError:
+            self.service.metrics.record_request(time.perf_counter() - started, error=True)
+            return self._send(503, {'error': "Час очікування прогнозу вичерпано"})
+        except Exception as e:
+            self.service.metrics.record_request(time.perf_counter() - started, error=True)
+            return self._send(500, {'error': str(e)})
+        self.service.metrics.record_request(time.perf_counter() - started, cache_hit=cache_hit(result))
+        self._send(200, result)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/health":
+            self._send(200, self.service.health())
+        elif url.path == "/metrics":
+            self._send(200, self.service.metrics.snapshot())
+        elif url.path == "/forecast":
+            self._handle(lambda: self.service.forecast(
+                int(params.get('year', [pd.Timestamp.now().year])[0]),
+                params.get('station', [DatabaseManager.DEFAULT_STATION])[0]
+            ), cache_hit=lambda result: result['cached'])
+        else:
+            self._send(404, {'error': f"Невідомий шлях {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/predict":
+            return self._send(404, {'error': f"Невідомий шлях {url.path}"})
+
+        def action():
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except ValueError as e:
+                raise ValueError(f"Некоректний JSON: {e}")
+            if not isinstance(payload, dict) or 'sequence' not in payload:
+                raise ValueError("Очікується JSON-об'єкт з полем sequence")
+            return self.service.predict(payload['sequence'])
+
+        self._handle(action)
+
+    def log_message(self, format, *args):
+        # Журнал кожного запиту суттєво сповільнює сервіс під навантаженням
+        pass
+
+
+class ForecastHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Стандартна черга з 5 з'єднань переповнюється вже за кількох десятків паралельних клієнтів
+    request_queue_size = 128
+
+
+def serve(config: ServiceConfig):
+    db_manager = DatabaseManager(DatabaseConfig())
+    model = TemperatureLSTM(ModelConfig())
+    if model.model is None:
+        print("Модель не навчена: спочатку навчіть її у застосунку")
+        return 1
+    model.warm_up(batch_sizes=(1, config.max_batch_size))
+
+    ForecastRequestHandler.service = ForecastService(model, db_manager, config)
+    server = ForecastHTTPServer((config.host, config.port), ForecastRequestHandler)
+    print(f"Сервіс прогнозів слухає http://{config.host}:{config.port} "
+          f"(батч до {config.max_batch_size}, очікування до {config.max_wait_ms} мс)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db_manager.close()
+    return 0
+
+
+def load_test(url, requests=1000, concurrency=32, sequence_length=None):
+    with urllib.request.urlopen(f"{url}/health") as response:
+        sequence_length = sequence_length or json.load(response)['sequence_length']
+
+    rng = np.random.default_rng(0)
+    bodies = [json.dumps({'sequence': rng.standard_normal((sequence_length, 4)).tolist()}).encode()
+              for _ in range(min(requests, 64))]
+
+    def send(i):
+        request = urllib.request.Request(f"{url}/predict", data=bodies[i % len(bodies)],
+                                         headers={'Content-Type': 'application/json'})
+        started = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.array(list(executor.map(send, range(requests)))) * 1000
+    elapsed = time.perf_counter() - started
+
+    print(f"{requests} запитів, {concurrency} паралельно: {requests / elapsed:.1f} запитів/с, "
+          f"p50 {np.percentile(latencies, 50):.1f} мс, p95 {np.percentile(latencies, 95):.1f} мс")
+    with urllib.request.urlopen(f"{url}/metrics") as response:
+        print(json.dumps(json.load(response), indent=2, ensure_ascii=False))
+
+
+def main():
+    config = ServiceConfig()
+    parser = argparse.ArgumentParser(description="Локальний HTTP-сервіс прогнозів температури")
+    parser.add_argument("--host", default=config.host)
+    parser.add_argument("--port", type=int, default=config.port)
+    parser.add_argument("--load-test", type=int, metavar="N", help="надіслати N запитів до запущеного сервісу")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    config.host, config.port = args.host, args.port
+    if args.load_test:
+        load_test(f"http://{config.host}:{config.port}", args.load_test, args.concurrency)
+        return 0
+    return serve(config)
+
+if __name__ == "__main__":
+    sys.exit(main())
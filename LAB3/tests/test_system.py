@@ -1,5 +1,6 @@
 import pytest
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from core.config import Config, DatabaseConfig, ModelConfig
 from database.connection import DatabaseConnection
@@ -102,6 +103,17 @@ def test_model_prediction(model, sample_weather_data):
         for pred in yearly_predictions:
             assert pred['min_temp'] <= pred['max_temp'], f"min_temp ({pred['min_temp']}) має бути менше або дорівнювати max_temp ({pred['max_temp']})"
 
+def test_prepare_data_windows(model, sample_weather_data):
+    X, y = model.prepare_data(sample_weather_data)
+
+    if len(X) < 2:
+        pytest.skip("Недостатньо даних для перевірки вікон")
+
+    assert X.shape == (len(y), model.sequence_length, 4)
+    assert X.dtype == np.float32
+    np.testing.assert_array_equal(X[1, -1, :2], y[0])
+    np.testing.assert_array_equal(X[1, :-1], X[0, 1:])
+
 def test_model_training(model, sample_weather_data):
 
     X, y = model.prepare_data(sample_weather_data)
@@ -148,4 +160,337 @@ def test_system_integration(config, db, db_manager, model, sample_weather_data):
         saved_predictions = db_manager.get_predictions_for_month(2024, 1)
         assert len(saved_predictions) > 0
     else:
-        pytest.skip("Недостатньо даних для тестування повного циклу") 
\ No newline at end of file
+        pytest.skip("Недостатньо даних для тестування повного циклу") 
+
+
+def test_numpy_runtime_matches_keras(model, sample_weather_data, tmp_path):
+    from ml.numpy_runtime import NumpyLSTM
+
+    X, y = model.prepare_data(sample_weather_data)
+    if len(X) == 0 or model.model is None:
+        pytest.skip("Немає навченої моделі для порівняння")
+
+    numpy_model = NumpyLSTM.load(model.export_numpy(tmp_path / "model.npz"))
+    np.testing.assert_allclose(numpy_model(X[:8]), model.model.predict(X[:8], verbose=0), atol=1e-4)
+
+def test_streaming_metrics_match_sklearn():
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+    from ml.metrics import StreamingMetrics
+
+    rng = np.random.default_rng(0)
+    actual = rng.normal(10, 5, size=(1000, 2))
+    predicted = actual + rng.normal(0, 1, size=(1000, 2))
+
+    metrics = StreamingMetrics()
+    for start in range(0, len(actual), 128):
+        metrics.update(actual[start:start + 128], predicted[start:start + 128])
+    result = metrics.result()
+
+    for column, name in enumerate(['min_temp', 'max_temp']):
+        assert result[name]['mse'] == pytest.approx(mean_squared_error(actual[:, column], predicted[:, column]))
+        assert result[name]['mae'] == pytest.approx(mean_absolute_error(actual[:, column], predicted[:, column]))
+        assert result[name]['r2'] == pytest.approx(r2_score(actual[:, column], predicted[:, column]))
+
+def test_micro_batcher_coalesces_requests():
+    from service import MicroBatcher, ServiceMetrics
+
+    metrics = ServiceMetrics()
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items], max_batch_size=16, max_wait=0.05,
+                           metrics=metrics)
+    futures = [batcher.submit(i) for i in range(40)]
+
+    assert [future.result(timeout=5) for future in futures] == [i * 2 for i in range(40)]
+    snapshot = metrics.snapshot()
+    assert snapshot['max_batch_size'] <= 16
+    assert snapshot['batches'] < 40
+
+def test_mc_dropout_intervals(model, sample_weather_data, db_manager):
+    X, _ = model.prepare_data(sample_weather_data)
+    if len(X) == 0 or model.model is None:
+        pytest.skip("Немає навченої моделі для оцінки інтервалів")
+
+    predictions = model.predict_years(X[-1:], pd.Timestamp(2024, 1, 1), 2024, samples=8)[2024][0]
+    for pred in predictions:
+        assert pred['min_temp_low'] <= pred['min_temp'] <= pred['min_temp_high']
+        assert pred['max_temp_low'] <= pred['max_temp'] <= pred['max_temp_high']
+        assert pred['confidence'] == model.config.prediction_interval
+
+    assert db_manager.save_predictions(predictions, 2024, forecast_key="0" * 40) == True
+    saved = db_manager.get_forecast(2024, "0" * 40)
+    assert saved[0]['min_temp_low'] == pytest.approx(float(predictions[0]['min_temp_low']))
+
+def test_micro_batcher_fails_short_results():
+    from service import MicroBatcher
+
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=8, max_wait=0.05, timeout=5)
+    futures = [batcher.submit(i) for i in range(4)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_registry_promote_rollback_swap(tmp_path):
+    from ml.lstm_model import build_model
+
+    model = TemperatureLSTM(ModelConfig(registry_dir=tmp_path / "registry", sequence_length=8))
+    model.scaler = {'min': {'mean': 0.0, 'std': 1.0}, 'max': {'mean': 0.0, 'std': 1.0}}
+    X = np.random.default_rng(0).standard_normal((4, 8, 4)).astype(np.float32)
+
+    first, second = (build_model((8, 4), 1e-3, lstm_units=(4, 2), dense_units=2) for _ in range(2))
+    for network in (first, second):
+        network.build((None, 8, 4))
+    expected_first = np.sort(first.predict(X, verbose=0), axis=1)
+    expected_second = np.sort(second.predict(X, verbose=0), axis=1)
+
+    model.model = first
+    v1 = model.save()
+    v2 = model.save(second)
+    assert model.version == v2 and model.registry.active_version == v2
+    np.testing.assert_allclose(model.predict(X), expected_second, atol=1e-5)
+
+    assert model.rollback() == v1
+    assert model.registry.active_version == v1
+    np.testing.assert_allclose(model.predict(X), expected_first, atol=1e-5)
+
+    model.promote(v2)
+    assert model.version == v2 and model.registry.previous_version == v1
+    np.testing.assert_allclose(model.predict(X), expected_second, atol=1e-5)
+
+
+def test_incremental_import_upserts_after_watermark(db_manager, tmp_path):
+    station = "test-incremental"
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    pd.DataFrame({'timestamp': ['20240101T0000', '20240101T0100', '20240101T0100'],
+                  'temperature': [1.0, 2.0, 3.0]}).to_csv(first, index=False)
+    # Рядки до водяного знаку ігноруються, нові додаються, дублікати зводяться до одного запису
+    pd.DataFrame({'timestamp': ['20240101T0000', '20240101T0200', '20240101T0200'],
+                  'temperature': [9.0, 4.0, 5.0]}).to_csv(second, index=False)
+
+    assert db_manager.import_csv_data(str(first), station_id=station) == True
+    assert db_manager.import_csv_data(str(first), station_id=station) == False
+    assert db_manager.import_csv_data(str(second), incremental=True, station_id=station) == True
+    assert db_manager.last_import_stats['rows'] == 2
+
+    data = db_manager.get_all_data(station_id=station)
+    assert data['temperature'].tolist() == [1.0, 3.0, 5.0]
+    daily = db_manager.get_daily_data(station_id=station)
+    assert daily[['min_temperature', 'max_temperature', 'sample_count']].values.tolist() == [[1.0, 5.0, 3]]
+
+
+def test_history_cache_follows_station_revision(db_manager, tmp_path):
+    station = "test-cache"
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    pd.DataFrame({'timestamp': ['20240101T0000', '20240101T1200'],
+                  'temperature': [0.1, 2.3]}).to_csv(first, index=False)
+    pd.DataFrame({'timestamp': ['20240102T0000'], 'temperature': [7.7]}).to_csv(second, index=False)
+
+    assert db_manager.import_csv_data(str(first), station_id=station) == True
+    other_revision = db_manager.get_data_watermark(DatabaseManager.DEFAULT_STATION)
+    miss = db_manager.get_daily_data(station_id=station)
+    hit = db_manager.get_daily_data(station_id=station)
+    pd.testing.assert_frame_equal(miss, hit)
+    pd.testing.assert_frame_equal(db_manager.get_all_data(station_id=station),
+                                  db_manager.get_all_data(station_id=station))
+
+    # Імпорт змінює ревізію лише своєї станції, і кеш одразу бачить нові рядки
+    assert db_manager.import_csv_data(str(second), incremental=True, station_id=station) == True
+    assert db_manager.get_data_watermark(DatabaseManager.DEFAULT_STATION) == other_revision
+    daily = db_manager.get_daily_data(station_id=station)
+    assert daily['max_temperature'].tolist() == [2.3, 7.7]
+    assert db_manager.get_all_data(station_id=station)['timestamp'].iloc[-1] == pd.Timestamp('2024-01-02')
+
+
+def test_forecast_engine_matches_predict_loop():
+    from ml.inference import ForecastEngine
+    from ml.lstm_model import build_model
+
+    keras_model = build_model((8, 4), 1e-3, lstm_units=(4, 2), dense_units=2)
+    scaler = {'min': {'mean': 5.0, 'std': 4.0}, 'max': {'mean': 14.0, 'std': 6.0}}
+    sequence = np.random.default_rng(0).normal(size=(1, 8, 4)).astype(np.float32)
+    start_date = pd.Timestamp(2025, 12, 20)
+
+    # Попередня реалізація predict_year: model.predict на кожен день і зсув вікна через np.roll
+    current_sequence = sequence.copy()
+    expected = []
+    for i in range(20):
+        month = (start_date + pd.Timedelta(days=i)).month
+        current_sequence[0, :, -2:] = np.array([np.sin(2 * np.pi * month / 12), np.cos(2 * np.pi * month / 12)])
+        pred = np.sort(keras_model.predict(current_sequence, verbose=0), axis=1)
+        current_sequence = np.roll(current_sequence, -1, axis=1)
+        current_sequence[0, -1, :2] = pred[0]
+        expected.append(pred[0])
+
+    engine = ForecastEngine(keras_model, scaler, 8)
+    predictions = (engine.forecast(sequence, start_date, 20)[0] - engine.mean) / engine.std
+    np.testing.assert_allclose(predictions, np.array(expected), atol=5e-7)
+
+    # Прогін по роках починається з start_date, а не з 1 січня, і ділиться на зрізи років
+    years = engine.forecast_years(sequence, start_date, 2026)
+    assert [len(years[year][0]) for year in years] == [12, 365]
+    np.testing.assert_allclose(np.concatenate([years[2025][0], years[2026][0][:8]]),
+                               engine.forecast(sequence, start_date, 20)[0], atol=1e-6)
+    with pytest.raises(ValueError):
+        engine.forecast_years(sequence, start_date, 2024)
+
+
+def test_service_throughput_uses_recent_window():
+    import time
+    from service import ServiceMetrics
+
+    metrics = ServiceMetrics(rate_window=0.2)
+    for _ in range(5):
+        metrics.record_request(0.001)
+    time.sleep(0.3)
+    for _ in range(2):
+        metrics.record_request(0.001)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['requests'] == 7
+    assert snapshot['throughput_rps'] == pytest.approx(2 / 0.2)
+
+
+def test_forecast_cache_keeps_model_versions_apart(db_manager):
+    from ml.forecast_cache import ForecastCache
+
+    station = "test-versions"
+    cache = ForecastCache(db_manager)
+    first = [{'min_temp': float(i), 'max_temp': float(i) + 1} for i in range(365)]
+    assert cache.put("a" * 40, 2030, first, station, model_version="v0001") == True
+    assert cache.put("b" * 40, 2030, [{'min_temp': -1.0, 'max_temp': 0.0}] * 365, station,
+                     model_version="v0002") == True
+
+    # Кожна версія читає свій прогноз з бази, а без версії на кожну дату є лише останній рядок
+    assert ForecastCache(db_manager).get("a" * 40, 2030, station, "v0001")[0]['min_temp'] == 0.0
+    assert ForecastCache(db_manager).get("a" * 40, 2030, station) is None
+    month = db_manager.get_predictions_for_month(2030, 12, station_id=station)
+    assert len(month) == 31
+    assert month['min_temperature'].tolist() == [-1.0] * 31
+    assert len(db_manager.get_predictions_for_month(2030, 12, "v0001", station_id=station)) == 31
+
+
+def test_compressed_weights_are_stored_compressed(tmp_path):
+    from ml.lstm_model import build_model
+    from ml.numpy_runtime import CompressedMatrix, NumpyLSTM, export_npz
+
+    keras_model = build_model((8, 4), 1e-3, lstm_units=(16, 8), dense_units=8)
+    X = np.random.default_rng(0).normal(size=(4, 8, 4)).astype(np.float32)
+    keras_model(X)
+    full = export_npz(keras_model, None, 8, tmp_path / "float32.npz")
+    reference = NumpyLSTM.load(full)
+
+    # Стиснуті ядра лежать у файлі та в пам'яті як є, тож обидва розміри менші за float32
+    for precision, atol in (("float16", 1e-2), ("int8", 5e-2)):
+        path = export_npz(keras_model, None, 8, tmp_path / f"{precision}.npz", precision)
+        numpy_model = NumpyLSTM.load(path)
+        assert numpy_model.precision == precision
+        assert isinstance(numpy_model.members[0][0][1]['fwd_recurrent'], CompressedMatrix)
+        assert path.stat().st_size < full.stat().st_size
+        assert numpy_model.nbytes < reference.nbytes
+        np.testing.assert_allclose(numpy_model(X), reference(X), atol=atol)
+
+
+def test_tuning_restores_adam_state_between_rungs():
+    from ml.tuning import _run_trial
+
+    config = ModelConfig(mixed_precision="float32")
+    features = np.random.default_rng(0).normal(size=(80, 4)).astype(np.float32)
+    scaler = {'min': {'mean': 0.0, 'std': 1.0}, 'max': {'mean': 0.0, 'std': 1.0}}
+    params = {'sequence_length': 8, 'batch_size': 16, 'learning_rate': 1e-3, 'lstm_units': (4, 2), 'dense_units': 2}
+    task = {'trial': 0, 'rung': 0, 'params': params, 'weights': None, 'optimizer': None, 'initial_epoch': 0,
+            'epochs': 1, 'features': features, 'scaler': scaler, 'config': config, 'seed': 42}
+
+    first = _run_trial(task)
+    second = _run_trial(dict(task, rung=1, weights=first['weights'], optimizer=first['optimizer'],
+                             initial_epoch=1, epochs=3))
+
+    # Лічильник кроків Adam продовжується з попереднього раунду: 56 вікон по 16 - 4 кроки на епоху
+    assert int(first['optimizer'][0]) == 4
+    assert int(second['optimizer'][0]) == 12
+
+
+def test_numpy_runtime_trains_and_fine_tunes(tmp_path):
+    from ml.numpy_runtime import NumpyLSTM
+
+    config = ModelConfig(registry_dir=tmp_path / "registry", sequence_length=8, runtime="numpy",
+                         lstm_units=(4, 2), dense_units=2, batch_size=16, fine_tune_epochs=1)
+    rng = np.random.default_rng(0)
+    minimum = rng.normal(5, 3, size=70)
+    daily = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=70, freq='D'),
+                          'min_temperature': minimum, 'max_temperature': minimum + 6})
+
+    model = TemperatureLSTM(config)
+    model.train_streaming(model.prepare_features(daily[:60]), epochs=1, n_splits=2)
+    assert isinstance(model.model, NumpyLSTM)
+
+    # Донавчання йде на Keras-артефакті активної версії, а обслуговує знову NumpyLSTM
+    assert model.fine_tune(daily, watermark=daily['date'][59]) is not None
+    assert model.version == "v0002"
+    assert isinstance(model.model, NumpyLSTM)
+
+
+def test_legacy_predictions_table_is_migrated(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "legacy.db"
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE predictions (id INTEGER PRIMARY KEY AUTOINCREMENT, date DATE NOT NULL,
+                                  min_temperature FLOAT NOT NULL, max_temperature FLOAT NOT NULL,
+                                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO predictions (date, min_temperature, max_temperature)
+        VALUES ('2030-01-01', 1, 2), ('2030-01-01', 3, 4), ('2030-01-02', 5, 6);
+    """)
+    connection.commit()
+    connection.close()
+
+    db_manager = DatabaseManager(DatabaseConfig(backend="sqlite", sqlite_path=path, cache_dir=tmp_path / "cache"))
+    # Дублікати дати зводяться до останнього рядка, стовпці нового ключа отримують значення за замовчуванням
+    month = db_manager.get_predictions_for_month(2030, 1, DatabaseManager.DEFAULT_MODEL_VERSION)
+    assert month[['min_temperature', 'max_temperature']].values.tolist() == [[3.0, 4.0], [5.0, 6.0]]
+    assert db_manager.save_predictions([{'min_temp': 0.0, 'max_temp': 1.0}] * 365, 2030, model_version="v0001")
+    assert len(db_manager.get_predictions_for_month(2030, 1, "v0001")) == 31
+    db_manager.close()
+
+
+def test_legacy_temperature_data_is_migrated(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "legacy.db"
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE temperature_data (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME NOT NULL,
+                                       temperature FLOAT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO temperature_data (timestamp, temperature)
+        VALUES ('2024-01-01 00:00:00', 1.0), ('2024-01-01 12:00:00', 5.0),
+               ('2024-01-02 00:00:00', -2.0), ('2024-01-02 00:00:00', -3.0);
+    """)
+    connection.commit()
+    connection.close()
+
+    db_manager = DatabaseManager(DatabaseConfig(backend="sqlite", sqlite_path=path, cache_dir=tmp_path / "cache"))
+    # Старі рядки належать станції за замовчуванням, а денне зведення будується з них під час міграції
+    assert db_manager.get_stations() == [DatabaseManager.DEFAULT_STATION]
+    assert db_manager.get_all_data()['temperature'].tolist() == [1.0, 5.0, -3.0]
+    daily = db_manager.get_daily_data()
+    assert daily[['min_temperature', 'max_temperature', 'sample_count']].values.tolist() == [[1.0, 5.0, 2],
+                                                                                            [-3.0, -3.0, 1]]
+    db_manager.close()
+
+
+def test_prepare_stations_shares_window_length(tmp_path):
+    model = TemperatureLSTM(ModelConfig(registry_dir=tmp_path / "registry", sequence_length=8))
+    daily = pd.concat([
+        pd.DataFrame({'station_id': station, 'date': pd.date_range('2024-01-01', periods=days, freq='D'),
+                      'min_temperature': np.arange(days, dtype=float), 'max_temperature': np.arange(days) + 5.0})
+        for station, days in (('long', 30), ('mid', 12), ('short', 5))
+    ], ignore_index=True)
+
+    # Станцію з коротшою історією пропущено, а не вкорочено вікно для всіх
+    windows = model.prepare_stations(daily)
+    assert list(windows) == ['long', 'mid']
+    assert [len(X) for X, _ in windows.values()] == [22, 4]
+    assert {X.shape[1] for X, _ in windows.values()} == {8}
+    assert model.sequence_length == 8
@@ -3,33 +3,48 @@ from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QFileDialog, QMessageBox, QProgressBar)
 from PySide6.QtCore import QThread, Signal
 import pandas as pd
-from datetime import datetime
 import sys
 import os
 import numpy as np
-from core.config import DatabaseConfig, ModelConfig
+from core.config import AppConfig, DatabaseConfig, ModelConfig
+from core.startup import startup_profiler
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.db_manager import DatabaseManager
 from ml.lstm_model import TemperatureLSTM
+from ml.forecast_cache import ForecastCache
+from ml.inference import ForecastEngine
 
 class TrainingThread(QThread):
-    finished = Signal(bool)  
+    finished = Signal(str)
     error = Signal(str)
     
-    def __init__(self, model, X, y):
+    def __init__(self, model, db_manager, daily_data, watermark):
         super().__init__()
         self.model = model
-        self.X = X
-        self.y = y
+        self.db_manager = db_manager
+        self.daily_data = daily_data
+        self.watermark = watermark
         
     def run(self):
         try:
+            data_watermark = pd.Timestamp(self.daily_data['date'].max()).date()
             if self.model.model is None:
-                self.model.train(self.X, self.y)
-                self.finished.emit(True)
-            else:
-                
-                self.finished.emit(False)
+                histories = self.model.train_streaming(self.model.prepare_features(self.daily_data))
+                self.db_manager.save_model_metadata('LSTM', {'mode': 'full', 'loss': histories[-1]['loss'][-1]},
+                                                    data_watermark, version=self.model.version,
+                                                    model_path=str(self.model.artifact_path))
+                self.finished.emit("trained")
+                return
+
+            # Модель вже є: донавчання лише на днях, новіших за останнє навчання
+            history = self.model.fine_tune(self.daily_data, self.watermark)
+            if history is None:
+                self.finished.emit("up_to_date")
+                return
+            self.db_manager.save_model_metadata('LSTM', {'mode': 'fine_tune', 'loss': history['loss'][-1]},
+                                                data_watermark, version=self.model.version,
+                                                model_path=str(self.model.artifact_path))
+            self.finished.emit("fine_tuned")
         except Exception as e:
             self.error.emit(str(e))
 
@@ -41,6 +56,7 @@ class MainWindow(QMainWindow):
         
         self.db_manager = DatabaseManager(DatabaseConfig())
         self.lstm_model = TemperatureLSTM(ModelConfig())
+        self.forecast_cache = ForecastCache(self.db_manager)
         
         self.init_ui()
         
@@ -59,6 +75,11 @@ class MainWindow(QMainWindow):
         self.train_btn.clicked.connect(self.train_model)
         self.train_btn.setEnabled(False)
         top_panel.addWidget(self.train_btn)
+
+        self.rollback_btn = QPushButton("Відкотити модель")
+        self.rollback_btn.clicked.connect(self.rollback_model)
+        self.rollback_btn.setEnabled(self.lstm_model.registry.previous_version is not None)
+        top_panel.addWidget(self.rollback_btn)
         
         self.year_combo = QComboBox()
         self.year_combo.addItems([str(year) for year in range(2025, 2031)])
@@ -83,6 +104,18 @@ class MainWindow(QMainWindow):
         self.table.setAlternatingRowColors(True)
         layout.addWidget(self.table)
         
+    def start_background_loading(self):
+        self.lstm_model.load_async(on_loaded=self.on_model_loaded)
+
+    def on_model_loaded(self):
+        # Викликається з фонового потоку, тому тут немає звернень до віджетів Qt
+        startup_profiler.mark("завантаження моделі")
+        if self.lstm_model.model is not None:
+            self.lstm_model.warm_up()
+            startup_profiler.mark("прогрів моделі")
+        print(startup_profiler.report(self.lstm_model.load_timings))
+        startup_profiler.save(AppConfig().startup_report, self.lstm_model.load_timings)
+
     def import_csv(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Виберіть CSV файл", "", "CSV Files (*.csv)"
@@ -90,24 +123,27 @@ class MainWindow(QMainWindow):
         
         if file_path:
             try:
-                if self.db_manager.import_csv_data(file_path):
-                    QMessageBox.information(self, "Успіх", "Дані успішно імпортовано")
+                if not self.db_manager.import_csv_data(file_path, incremental=True):
+                    raise RuntimeError("не вдалося імпортувати файл")
+                imported = self.db_manager.last_import_stats.get("rows", 0)
+                if imported:
+                    QMessageBox.information(self, "Успіх", f"Імпортовано нових записів: {imported}")
                 else:
-                    QMessageBox.information(self, "Інформація", "Дані вже імпортовано")
+                    QMessageBox.information(self, "Інформація", "Нових даних немає, дані вже імпортовано")
                 self.train_btn.setEnabled(True)
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Помилка при імпорті: {str(e)}")
                 
     def train_model(self):
         try:
-            df = self.db_manager.get_all_data()
-            X, y = self.lstm_model.prepare_data(df)
+            daily_data = self.db_manager.get_daily_data()
+            watermark = self.db_manager.get_training_watermark()
             
             self.train_btn.setEnabled(False)
             self.progress_bar.setVisible(True)
             self.progress_bar.setRange(0, 0)  
             
-            self.training_thread = TrainingThread(self.lstm_model, X, y)
+            self.training_thread = TrainingThread(self.lstm_model, self.db_manager, daily_data, watermark)
             self.training_thread.finished.connect(self.on_training_finished)
             self.training_thread.error.connect(self.on_training_error)
             self.training_thread.start()
@@ -115,16 +151,27 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Помилка", f"Помилка при підготовці даних: {str(e)}")
             
-    def on_training_finished(self, trained):
+    def on_training_finished(self, mode):
         self.progress_bar.setVisible(False)
         self.train_btn.setEnabled(True)
         self.predict_btn.setEnabled(True)
         
-        if trained:
+        self.rollback_btn.setEnabled(self.lstm_model.registry.previous_version is not None)
+        if mode == "trained":
             QMessageBox.information(self, "Успіх", "Модель успішно навчено")
+        elif mode == "fine_tuned":
+            QMessageBox.information(self, "Успіх", "Модель донавчено на нових даних")
         else:
-            QMessageBox.information(self, "Інформація", "Модель вже була навчена раніше")
+            QMessageBox.information(self, "Інформація", "Нових даних після останнього навчання немає")
             
+    def rollback_model(self):
+        try:
+            version = self.lstm_model.rollback()
+            self.rollback_btn.setEnabled(self.lstm_model.registry.previous_version is not None)
+            QMessageBox.information(self, "Успіх", f"Активна модель: {version}")
+        except Exception as e:
+            QMessageBox.critical(self, "Помилка", f"Помилка при відкаті моделі: {str(e)}")
+
     def on_training_error(self, error_msg):
         self.progress_bar.setVisible(False)
         self.train_btn.setEnabled(True)
@@ -132,24 +179,38 @@ class MainWindow(QMainWindow):
             
     def make_prediction(self):
         try:
-            df = self.db_manager.get_all_data()
-            X, _ = self.lstm_model.prepare_data(df)
-            predictions = self.lstm_model.predict_year(X[-1:])
-            
+            last_sequence, start_date = self.lstm_model.last_window(self.db_manager.get_daily_data())
             year = int(self.year_combo.currentText())
-            if self.db_manager.save_predictions(predictions, year):
+
+            key = self.forecast_cache.make_key(self.lstm_model, last_sequence, year, start_date)
+            predictions = self.forecast_cache.get(key, year, model_version=self.lstm_model.version)
+            saved = True
+            if predictions is None:
+                # Один прогін до останнього року зі списку: решта років зберігається разом з обраним
+                years = [int(self.year_combo.itemText(i)) for i in range(self.year_combo.count())]
+                forecasts = self.lstm_model.predict_years(last_sequence, start_date, max(years))
+                for forecast_year, (records,) in forecasts.items():
+                    forecast_key = self.forecast_cache.make_key(self.lstm_model, last_sequence, forecast_year,
+                                                                start_date)
+                    if not self.forecast_cache.put(forecast_key, forecast_year, records,
+                                                   start_date=ForecastEngine.year_start(start_date, forecast_year),
+                                                   model_version=self.lstm_model.version):
+                        saved = False
+                predictions = forecasts[year][0]
+
+            if saved:
                 self.table.setRowCount(0)
                 
-                start_date = datetime(year, 1, 1)
+                first_day = ForecastEngine.year_start(start_date, year)
                 for i, pred in enumerate(predictions):
-                    current_date = start_date + pd.Timedelta(days=i)
+                    current_date = first_day + pd.Timedelta(days=i)
                     
                     row_position = self.table.rowCount()
                     self.table.insertRow(row_position)
                     
                     self.table.setItem(row_position, 0, QTableWidgetItem(current_date.strftime("%Y-%m-%d")))
-                    self.table.setItem(row_position, 1, QTableWidgetItem(f"{pred['min_temp']:.1f}°C"))
-                    self.table.setItem(row_position, 2, QTableWidgetItem(f"{pred['max_temp']:.1f}°C"))
+                    self.table.setItem(row_position, 1, QTableWidgetItem(self._format_temperature(pred, 'min_temp')))
+                    self.table.setItem(row_position, 2, QTableWidgetItem(self._format_temperature(pred, 'max_temp')))
                 
                 QMessageBox.information(self, "Успіх", "Прогноз успішно збережено")
             else:
@@ -158,6 +219,13 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Помилка", f"Помилка при прогнозуванні: {str(e)}")
             
+    @staticmethod
+    def _format_temperature(pred, key):
+        text = f"{pred[key]:.1f}°C"
+        if pred.get(f"{key}_low") is not None:
+            text += f" ({pred[f'{key}_low']:.1f}…{pred[f'{key}_high']:.1f})"
+        return text
+
     def closeEvent(self, event):
         self.db_manager.close()
         event.accept()